@@ -0,0 +1,167 @@
+# agent.py
+import sys
+import time
+
+from call_function import ToolDispatcher, call_functions
+from functions.registry import tool_declarations
+
+MODEL = "gemini-2.0-flash-001"
+
+SYSTEM_INSTRUCTION = "You are Killer Koala, an assistant that can explore files and run code."
+
+
+def request_config(system_instruction, cached_content=None):
+    from google.genai import types
+
+    if cached_content:
+        # The system instruction and tools are part of the cached prefix
+        return types.GenerateContentConfig(cached_content=cached_content)
+    return types.GenerateContentConfig(
+        tools=[tool_declarations()],
+        system_instruction=system_instruction,
+    )
+
+
+def _mode_tag(dry_run):
+    return "[SAFE MODE]" if dry_run else "[UNSAFE MODE]"
+
+
+def _record_usage(usage_metadata, history, verbose):
+    if verbose and usage_metadata:
+        print("Prompt tokens:", usage_metadata.prompt_token_count)
+        print("Response tokens:", usage_metadata.candidates_token_count)
+        if usage_metadata.cached_content_token_count:
+            print("Cached tokens:", usage_metadata.cached_content_token_count)
+    if usage_metadata:
+        history.record_usage(usage_metadata.prompt_token_count)
+
+
+def _append_tool_results(function_call_results, history, verbose):
+    from google.genai import types
+
+    function_responses = []
+    for function_call_result in function_call_results:
+        if (
+            not function_call_result.parts
+            or not function_call_result.parts[0].function_response
+        ):
+            raise Exception("empty function call result")
+        if verbose:
+            print(f"-> {function_call_result.parts[0].function_response.response}")
+        function_responses.append(function_call_result.parts[0])
+
+    if not function_responses:
+        raise Exception("no function responses generated, exiting.")
+
+    history.append(types.Content(role="user", parts=function_responses))
+
+
+def handle_response(response, history, verbose, dry_run, span=None, working_directory=None):
+    """
+    Add one model response to the history and act on it. Returns the tagged
+    final text, or None after running the requested tools and appending
+    their results (the caller should ask the model again).
+    """
+    _record_usage(response.usage_metadata, history, verbose)
+
+    if response.candidates:
+        for candidate in response.candidates:
+            function_call_content = candidate.content
+            history.append(function_call_content)
+
+    if not response.function_calls:
+        return f"{_mode_tag(dry_run)}\n\n{response.text}"
+
+    tools_start = time.perf_counter()
+    function_call_results = call_functions(
+        response.function_calls,
+        verbose=verbose,
+        dry_run=dry_run,
+        span=span,
+        working_directory=working_directory,
+    )
+    if span is not None:
+        span.tools_ms = round((time.perf_counter() - tools_start) * 1000, 3)
+    _append_tool_results(function_call_results, history, verbose)
+
+
+def handle_stream(
+    chunks, history, verbose, dry_run, span=None, working_directory=None, model_start=None, out=None
+):
+    """
+    handle_response for a generate_content_stream iterator. Text is written
+    to `out` (default stdout) after the mode tag as it arrives, and every
+    function call starts running as soon as its part arrives, while the rest
+    of the response is still streaming. Token counts come from the last
+    chunk. Returns the tagged final text (already printed) or None.
+    """
+    from google.genai import types
+
+    out = out or sys.stdout
+    model_start = model_start if model_start is not None else time.perf_counter()
+    mode_tag = _mode_tag(dry_run)
+    parts = []
+    text = []
+    usage_metadata = None
+    dispatcher = tools_start = None
+
+    try:
+        for chunk in chunks:
+            if chunk.usage_metadata:
+                usage_metadata = chunk.usage_metadata
+            content = chunk.candidates[0].content if chunk.candidates else None
+            for part in (content.parts if content and content.parts else []):
+                if span is not None and span.first_chunk_ms is None:
+                    span.first_chunk_ms = round((time.perf_counter() - model_start) * 1000, 3)
+                if part.function_call:
+                    if text and not text[-1].endswith("\n"):
+                        out.write("\n")
+                        text.append("\n")
+                    if dispatcher is None:
+                        tools_start = time.perf_counter()
+                        dispatcher = ToolDispatcher(verbose, dry_run, span, working_directory)
+                    parts.append(part)
+                    dispatcher.submit(part.function_call)
+                elif part.text is not None and not part.thought:
+                    if not text:
+                        out.write(f"{mode_tag}\n\n")
+                    out.write(part.text)
+                    out.flush()
+                    text.append(part.text)
+                    last = parts[-1] if parts else None
+                    if last is not None and last.text is not None and not last.thought:
+                        # Keep the history to one text part per run of chunks
+                        parts[-1] = last.model_copy(update={"text": last.text + part.text})
+                    else:
+                        parts.append(part)
+                else:
+                    parts.append(part)
+    except BaseException:
+        # The stream broke: keep what arrived, and let the calls already
+        # submitted finish so every function call in the history has its result
+        if text and not text[-1].endswith("\n"):
+            out.write("\n")
+        if parts:
+            history.append(types.Content(role="model", parts=parts))
+        if dispatcher is not None:
+            _append_tool_results(dispatcher.finish(), history, verbose)
+        raise
+
+    if text and not text[-1].endswith("\n"):
+        out.write("\n")
+    if span is not None:
+        span.model_done(time.perf_counter() - model_start, usage_metadata)
+    _record_usage(usage_metadata, history, verbose)
+    if parts:
+        history.append(types.Content(role="model", parts=parts))
+
+    if dispatcher is None:
+        if not text:
+            out.write(f"{mode_tag}\n\n")
+        out.flush()
+        return f"{mode_tag}\n\n{''.join(text)}"
+
+    function_call_results = dispatcher.finish()
+    if span is not None:
+        span.tools_ms = round((time.perf_counter() - tools_start) * 1000, 3)
+    _append_tool_results(function_call_results, history, verbose)
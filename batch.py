@@ -0,0 +1,168 @@
+# batch.py
+import asyncio
+import json
+import time
+
+from agent import MODEL, handle_response, request_config
+from config import MAX_ITERS
+from message_history import MessageHistory
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `per_minute` / 60 per second,
+    holding at most `per_minute`. Waiters are served in arrival order.
+    A `per_minute` of 0 turns the limit off.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        if not self.capacity:
+            return
+        # A request bigger than the whole bucket waits for a full bucket, not forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.level < amount:
+                await asyncio.sleep((amount - self.level) / self.rate)
+                self._refill()
+            self.level -= amount
+
+    def settle(self, amount):
+        """Charge (or refund, when negative) a correction once the real cost is known."""
+        if self.capacity:
+            self._refill()
+            self.level -= amount
+
+
+class RateLimits:
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+
+def read_jobs(path):
+    """Parse a prompts JSONL file: one {"prompt", "id"?, "working_directory"?} per line."""
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if isinstance(job, str):
+                job = {"prompt": job}
+            if not job.get("prompt"):
+                raise ValueError(f"{path}:{line_number}: missing \"prompt\"")
+            job.setdefault("id", line_number)
+            jobs.append(job)
+    return jobs
+
+
+async def run_session(client, job, limits, dry_run, system_instruction):
+    """Run one prompt to completion on the async client; returns its result record."""
+    from google.genai import types
+
+    history = MessageHistory(
+        [types.Content(role="user", parts=[types.Part.from_text(text=job["prompt"])])]
+    )
+    record = {
+        "id": job["id"],
+        "prompt": job["prompt"],
+        "working_directory": job.get("working_directory"),
+        "result": None,
+        "error": None,
+        "turns": 0,
+        "prompt_tokens": 0,
+        "candidates_tokens": 0,
+    }
+    start = time.perf_counter()
+    try:
+        for _ in range(MAX_ITERS):
+            history.compact()
+            estimate = history.estimated_tokens()
+            await limits.requests.acquire()
+            await limits.tokens.acquire(estimate)
+
+            response = await client.aio.models.generate_content(
+                model=MODEL,
+                contents=history.messages,
+                config=request_config(system_instruction),
+            )
+            record["turns"] += 1
+            usage = response.usage_metadata
+            if usage:
+                record["prompt_tokens"] += usage.prompt_token_count or 0
+                record["candidates_tokens"] += usage.candidates_token_count or 0
+                limits.tokens.settle((usage.total_token_count or 0) - estimate)
+
+            # Tools are blocking; run them off the event loop
+            result = await asyncio.to_thread(
+                handle_response,
+                response,
+                history,
+                False,
+                dry_run,
+                None,
+                job.get("working_directory"),
+            )
+            if result:
+                record["result"] = result
+                break
+        else:
+            record["error"] = f"Stopped after {MAX_ITERS} iterations without a final response."
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+async def run_batch(
+    client,
+    jobs,
+    output_path,
+    concurrency,
+    requests_per_minute,
+    tokens_per_minute,
+    dry_run,
+    system_instruction,
+):
+    """
+    Run every job with at most `concurrency` sessions in flight, appending
+    each result to `output_path` as soon as its session finishes.
+    Returns (succeeded, failed).
+    """
+    limits = RateLimits(requests_per_minute, tokens_per_minute)
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+    counts = {"ok": 0, "error": 0}
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        async def worker():
+            while not queue.empty():
+                job = queue.get_nowait()
+                record = await run_session(client, job, limits, dry_run, system_instruction)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                status = "error" if record["error"] else "ok"
+                counts[status] += 1
+                print(
+                    f"[{counts['ok'] + counts['error']}/{len(jobs)}] {job['id']}: "
+                    f"{status} in {record['seconds']}s"
+                )
+
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(jobs))))))
+
+    return counts["ok"], counts["error"]
@@ -0,0 +1,72 @@
+# benchmarks/__main__.py
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.suite import compare, run_suite
+from benchmarks.workspace import make_workspace
+from config import BENCH_REGRESSION_THRESHOLD, WORKING_DIR
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent's tools, dispatcher and calculator")
+    parser.add_argument("--dirs", type=int, default=20, help="Top-level directories in the workspace")
+    parser.add_argument("--files", type=int, default=50, help="Files per directory")
+    parser.add_argument("--lines", type=int, default=200, help="Lines per file")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats (best one is kept)")
+    parser.add_argument("--output", metavar="PATH", help="Write results as JSON to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against an earlier --output file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=BENCH_REGRESSION_THRESHOLD,
+        help="Allowed slowdown versus the baseline (0.25 = 25%%)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        workspace = make_workspace(
+            os.path.join(root, WORKING_DIR), args.dirs, args.files, args.lines
+        )
+        results = run_suite(root, repeat=args.repeat)
+
+    for name, seconds in results.items():
+        print(f"{name:<42} {seconds * 1e6:>12.2f} µs/call")
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workspace": workspace,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSION {name}: {old * 1e6:.2f} -> {new * 1e6:.2f} µs/call ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {baseline.get('commit') or args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
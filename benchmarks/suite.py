@@ -0,0 +1,85 @@
+# benchmarks/suite.py
+import contextlib
+import io
+import os
+import sys
+import timeit
+
+from google.genai import types
+
+from call_function import call_function
+from config import WORKING_DIR
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.safe_path import safe_path
+from functions.tool_cache import tool_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "calculator"))
+from pkg.calculator import Calculator, np  # noqa: E402
+
+
+def _cases(working_directory):
+    """Yield (name, zero-argument callable) for every benchmark case."""
+    target = "dir00/file_000.py"
+    yield "safe_path", lambda: safe_path(target, working_directory)
+    yield "get_files_info flat", lambda: get_files_info(working_directory, "dir00")
+    yield "get_files_info recursive", lambda: get_files_info(
+        working_directory, ".", recursive=True
+    )
+    yield "get_file_content whole", lambda: get_file_content(working_directory, target)
+    yield "get_file_content lines", lambda: get_file_content(
+        working_directory, target, start_line=100, end_line=120
+    )
+
+    # call_function always runs against WORKING_DIR, which the runner points at the workspace
+    read_call = types.FunctionCall(name="get_file_content", args={"file_path": target})
+
+    def dispatch_cold():
+        tool_cache.clear()
+        call_function(read_call)
+
+    yield "call_function dispatch (cold cache)", dispatch_cold
+    yield "call_function dispatch (cached)", lambda: call_function(read_call)
+
+    calculator = Calculator()
+    uncached = Calculator(cache_size=0)
+    expression = "3 + 5 * (2 - 8) / 4 - x"
+    variables = {"x": 2.0}
+    yield "Calculator.evaluate (cached program)", lambda: calculator.evaluate(expression, variables)
+    yield "Calculator.evaluate (compile each time)", lambda: uncached.evaluate(expression, variables)
+    if np is not None:
+        columns = {"x": np.arange(100_000, dtype=np.float64)}
+        yield "Calculator.evaluate_columns (100k rows)", lambda: calculator.evaluate_columns(
+            expression, columns
+        )
+
+
+def run_suite(workspace_root, repeat=5):
+    """
+    Time every case against a workspace whose tool sandbox lives at
+    `workspace_root`/WORKING_DIR. Returns {name: seconds per call} (best of `repeat`).
+    """
+    working_directory = os.path.join(workspace_root, WORKING_DIR)
+    previous = os.getcwd()
+    os.chdir(workspace_root)
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, func in _cases(working_directory):
+                timer = timeit.Timer(func)
+                number, _ = timer.autorange()
+                results[name] = min(timer.repeat(repeat=repeat, number=number)) / number
+    finally:
+        os.chdir(previous)
+        tool_cache.clear()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return [(name, old, new, ratio)] for cases slower than baseline by more than `threshold`."""
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old and new / old > 1 + threshold:
+            regressions.append((name, old, new, new / old))
+    return regressions
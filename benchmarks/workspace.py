@@ -0,0 +1,44 @@
+# benchmarks/workspace.py
+import os
+import random
+
+_WORDS = "alpha beta gamma delta value result token index cache buffer".split()
+
+
+def _python_source(rng, lines):
+    out = [f'"""Synthetic module {rng.randrange(10**6)}."""', "import os", ""]
+    while len(out) < lines:
+        name = "_".join(rng.sample(_WORDS, 2))
+        out.append(f"def {name}_{len(out)}(value, count=3):")
+        for _ in range(rng.randint(2, 8)):
+            out.append(f"    value = value + {rng.randint(1, 99)}  # {rng.choice(_WORDS)}")
+        out.append("    return value")
+        out.append("")
+    return "\n".join(out[:lines]) + "\n"
+
+
+def make_workspace(root, dirs=20, files_per_dir=50, lines_per_file=200, depth=2, seed=0):
+    """
+    Fill `root` with a deterministic tree of Python-looking files:
+    `dirs` top-level directories (each nested `depth` levels deep) holding
+    `files_per_dir` files of `lines_per_file` lines. Returns a summary dict.
+    """
+    rng = random.Random(seed)
+    total_files = total_bytes = 0
+    for d in range(dirs):
+        directory = os.path.join(root, f"dir{d:02d}")
+        for level in range(depth):
+            level_dir = os.path.join(directory, *[f"sub{n}" for n in range(level)])
+            os.makedirs(level_dir, exist_ok=True)
+            for f in range(files_per_dir // depth or 1):
+                source = _python_source(rng, lines_per_file)
+                with open(os.path.join(level_dir, f"file_{f:03d}.py"), "w") as fh:
+                    fh.write(source)
+                total_files += 1
+                total_bytes += len(source)
+    return {
+        "dirs": dirs,
+        "files": total_files,
+        "bytes": total_bytes,
+        "lines_per_file": lines_per_file,
+    }
@@ -1,6 +1,7 @@
 import sys
 from pkg.calculator import Calculator
 from pkg.render import render
+from pkg.stream import serve_socket, serve_stdin
 
 
 def main():
@@ -8,9 +9,19 @@ def main():
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print("       python main.py --stdin [--table|--tsv]  (one expression per line)")
+        print("       python main.py --socket <path>          (serve lines on a Unix socket)")
         print('Example: python main.py "3 + 5"')
         return
 
+    if sys.argv[1] == "--stdin":
+        style = {"--table": "table", "--tsv": "tsv"}.get(sys.argv[2] if len(sys.argv) > 2 else None)
+        serve_stdin(style=style)
+        return
+    if sys.argv[1] == "--socket" and len(sys.argv) == 3:
+        serve_socket(sys.argv[2])
+        return
+
     expression = " ".join(sys.argv[1:])
     try:
         result = calculator.evaluate(expression)
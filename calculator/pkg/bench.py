@@ -0,0 +1,50 @@
+import re
+import timeit
+
+from pkg.calculator import Calculator
+
+SPACED = "2 * 3 - 8 / 2 + 5 * 7 - 1"
+UNSPACED = "2*3-8/2+5*7-1"
+
+# What machine-generated input had to go through before the scanner existed
+_NORMALIZE = re.compile(r"([-+*/])")
+
+
+def _normalize(expression):
+    return _NORMALIZE.sub(r" \1 ", expression)
+
+
+def bench_tokenizer(number=100_000):
+    """
+    Time one uncached parse+evaluate through the legacy and compiled paths
+    (evaluations/s). Spaced input is split like the legacy path does; only
+    unspaced input goes through the regex scanner.
+    """
+    calculator = Calculator(cache_size=0)
+    cases = {
+        "legacy _evaluate_infix (spaced)": lambda: calculator._evaluate_infix(
+            SPACED.split()
+        ),
+        "legacy _evaluate_infix (unspaced, normalized)": lambda: calculator._evaluate_infix(
+            _normalize(UNSPACED).split()
+        ),
+        "compile+run (spaced, split)": lambda: calculator.evaluate(SPACED),
+        "compile+run (unspaced, scanner)": lambda: calculator.evaluate(UNSPACED),
+    }
+    cached = Calculator()
+    cases["cached program (unspaced)"] = lambda: cached.evaluate(UNSPACED)
+
+    results = {}
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        results[name] = number / seconds
+    return results
+
+
+def main():
+    for name, rate in bench_tokenizer().items():
+        print(f"{name:<48} {rate:>12,.0f} evals/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,145 @@
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # evaluate_columns needs numpy; everything else works without it
+    np = None
+
+
+class Variable(str):
+    """A named input in a compiled program, looked up when the program runs."""
+
+
+class Unary(str):
+    """A prefix operator in a compiled program; only unary minus exists today."""
+
+
+NEGATE = Unary("-")
+
+
+# Distinct token texts remembered per operator set before the memo starts over
+TOKEN_MEMO_SIZE = 4096
+
+# Token kinds, numbered like the scanner's capture groups
+NUMBER, NAME, OPERATOR, LPAREN, RPAREN, INVALID = range(1, 7)
+# Not a scanner group: a whitespace-separated chunk such as "2*x" holding several tokens
+SEVERAL = 7
+TOKEN_KINDS = {
+    NUMBER: "number",
+    NAME: "name",
+    OPERATOR: "operator",
+    LPAREN: "lparen",
+    RPAREN: "rparen",
+}
+
+
+@lru_cache(maxsize=8)
+def _scanner(symbols):
+    operators = "|".join(re.escape(s) for s in sorted(symbols, key=len, reverse=True))
+    return re.compile(
+        r"\s*(?:"
+        r"((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+        r"|([A-Za-z_]\w*)"
+        rf"|({operators})"
+        r"|(\()"
+        r"|(\))"
+        r"|(\S)"
+        r")"
+    )
+
+
+@lru_cache(maxsize=8)
+def _lexicon(symbols):
+    """
+    For one operator set: findall splitting an expression into token texts
+    (the scanner's alternatives in one group, so no match objects are made),
+    and a text -> (kind, value) memo filled by _classify.
+    """
+    operators = "|".join(re.escape(s) for s in sorted(symbols, key=len, reverse=True))
+    pattern = re.compile(
+        r"\s*("
+        r"(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+        r"|[A-Za-z_]\w*"
+        rf"|{operators}"
+        r"|[()]"
+        r"|\S"
+        r")"
+    )
+    return pattern.findall, {}
+
+
+def _classify(symbols, known, text):
+    """
+    Memoized (kind, value) of a token text. A whitespace-separated chunk that
+    holds several tokens gets (SEVERAL, None) and is not remembered.
+    """
+    found = _scanner(symbols).match(text)
+    kind = found.lastindex
+    if found.end() != len(text):
+        return SEVERAL, None
+    if kind == NUMBER:
+        value = float(text)
+    elif kind == NAME:
+        value = Variable(text)
+    else:
+        value = text
+    if len(known) >= TOKEN_MEMO_SIZE:
+        known.clear()
+    known[text] = entry = (kind, value)
+    return entry
+
+
+def _match_at(expression, symbols, index):
+    """The scanner's match for token number `index`; only error messages need positions."""
+    for number, found in enumerate(_scanner(symbols).finditer(expression)):
+        if number == index:
+            return found
+
+
+def tokenize(expression, symbols=("+", "-", "*", "/")):
+    """
+    Scan `expression` in one pass, yielding (kind, text, position) tuples where
+    kind is "number", "name", "operator", "lparen" or "rparen". Whitespace is
+    optional; an unknown character raises ValueError with its position.
+    """
+    for found in _scanner(tuple(symbols)).finditer(expression):
+        kind = found.lastindex
+        if kind == INVALID:
+            raise ValueError(f"invalid token: {found[kind]} at position {found.start(kind)}")
+        yield TOKEN_KINDS[kind], found[kind], found.start(kind)
+
+
+def _checked_divide(a, b):
+    if np.any(b == 0):
+        raise ZeroDivisionError("float division by zero")
+    return np.divide(a, b)
+
+
+def _emit(output, symbol):
+    if symbol is NEGATE and output and output[-1].__class__ is float:
+        # A literal is the whole operand, so fold the sign into it
+        output[-1] = -output[-1]
+    else:
+        output.append(symbol)
+
+
+def _token_error(found, expect_operand):
+    kind = found.lastindex
+    text = found[kind]
+    position = found.start(kind)
+    if kind == INVALID:
+        return ValueError(f"invalid token: {text} at position {position}")
+    if kind == OPERATOR:
+        return ValueError(f"not enough operands for operator {text} at position {position}")
+    if kind == RPAREN:
+        return ValueError(f"unexpected ) at position {position}")
+    return ValueError(f"invalid expression: unexpected {text} at position {position}")
+
+
 class Calculator:
-    def __init__(self):
+    def __init__(self, cache_size=1024):
         self.operators = {
             "+": lambda a, b: a + b,
             "-": lambda a, b: a - b,
@@ -12,12 +152,207 @@ class Calculator:
             "*": 2,
             "/": 2,
         }
+        # Whole-array versions of `operators` used by evaluate_columns; an
+        # operator missing here falls back to its scalar function on arrays
+        self.vector_operators = (
+            {
+                "+": np.add,
+                "-": np.subtract,
+                "*": np.multiply,
+                "/": _checked_divide,
+            }
+            if np is not None
+            else {}
+        )
+        self.cache_size = cache_size
+        self._programs = OrderedDict()
 
-    def evaluate(self, expression):
+    def evaluate(self, expression, variables=None):
         if not expression or expression.isspace():
             return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
+        return self._run(self._get_program(expression), variables)
+
+    def evaluate_columns(self, expression, columns):
+        """
+        Evaluate one expression over whole columns at once. `columns` maps
+        variable names to equal-length sequences (a dict of lists or arrays, a
+        structured array, ...); the result is a float64 array with one value per row.
+        """
+        if np is None:
+            raise RuntimeError("evaluate_columns requires numpy")
+        program = self._get_program(expression)
+        arrays = {
+            step: np.asarray(self._lookup(columns, step), dtype=np.float64)
+            for step in program
+            if step.__class__ is Variable
+        }
+
+        stack = []  # (value, owned): owned arrays are temporaries safe to overwrite
+        for step in program:
+            if step.__class__ is float:
+                stack.append((step, False))
+            elif step.__class__ is Variable:
+                stack.append((arrays[step], False))
+            elif step.__class__ is Unary:
+                a, _ = stack.pop()
+                stack.append((np.negative(a), True))
+            else:
+                b, _ = stack.pop()
+                a, owned = stack.pop()
+                operator = self.vector_operators.get(step)
+                if operator is None:
+                    stack.append((self.operators[step](a, b), True))
+                elif owned and isinstance(a, np.ndarray) and operator is not _checked_divide:
+                    stack.append((operator(a, b, out=a), True))
+                else:
+                    stack.append((operator(a, b), True))
+
+        result, owned = stack[0]
+        if np.ndim(result) == 0:
+            return np.full(self._row_count(columns), result, dtype=np.float64)
+        return result if owned else result.copy()
+
+    @staticmethod
+    def _row_count(columns):
+        try:
+            return len(next(iter(columns.values())))
+        except (AttributeError, StopIteration, TypeError):
+            return len(columns)
+
+    def evaluate_many(self, expressions, variables=None):
+        results = []
+        programs = {}
+        for expression in expressions:
+            if not expression or expression.isspace():
+                results.append(None)
+                continue
+            program = programs.get(expression)
+            if program is None:
+                program = programs[expression] = self._get_program(expression)
+            results.append(self._run(program, variables))
+        return results
+
+    def compile(self, expression):
+        """
+        Turn an infix expression into an RPN program: a tuple of floats,
+        Variable names, binary operator symbols and Unary operators.
+        """
+        symbols = tuple(self.operators)
+        scan, known = _lexicon(symbols)
+        if " " not in expression:
+            # Unspaced input ("2*x+1") goes through the scanner once
+            return self._parse(expression, scan(expression), symbols, known)
+        # Spaced input ("2 * x + 1") splits into its tokens far cheaper than the
+        # scanner finds them; a chunk holding several tokens sends it back there
+        program = self._parse(expression, expression.split(), symbols, known)
+        if program is None:
+            program = self._parse(expression, scan(expression), symbols, known)
+        return program
+
+    def _parse(self, expression, tokens, symbols, known):
+        """Shunting-yard over token texts; None if a text holds several tokens."""
+        precedence = self.precedence
+        output = []
+        append = output.append
+        pending = []  # (symbol, precedence, token index); "(" has precedence 0
+        push = pending.append
+        pop = pending.pop
+        expect_operand = True
+
+        for index, text in enumerate(tokens):
+            kind, value = known.get(text) or _classify(symbols, known, text)
+            if expect_operand:
+                if kind <= NAME:
+                    append(value)
+                    expect_operand = False
+                elif kind == LPAREN:
+                    push(("(", 0, index))
+                elif kind == SEVERAL:
+                    return None
+                elif value == "-" and kind == OPERATOR:
+                    push((NEGATE, max(precedence.values()) + 1, index))
+                else:
+                    raise _token_error(_match_at(expression, symbols, index), expect_operand)
+            elif kind == OPERATOR:
+                rank = precedence[value]
+                while pending and pending[-1][1] >= rank:
+                    symbol = pop()[0]
+                    if symbol is NEGATE:
+                        _emit(output, symbol)
+                    else:
+                        append(symbol)
+                push((value, rank, index))
+                expect_operand = True
+            elif kind == RPAREN:
+                while pending and pending[-1][0] != "(":
+                    _emit(output, pop()[0])
+                if not pending:
+                    position = _match_at(expression, symbols, index).start(RPAREN)
+                    raise ValueError(f"unbalanced ) at position {position}")
+                pop()
+            elif kind == SEVERAL:
+                return None
+            else:
+                raise _token_error(_match_at(expression, symbols, index), expect_operand)
+
+        if not tokens:
+            raise ValueError("invalid expression")
+        if expect_operand:
+            symbol, _, opened = pending[-1]
+            found = _match_at(expression, symbols, opened)
+            if symbol == "(":
+                raise ValueError(f"unbalanced ( at position {found.start(LPAREN)}")
+            raise ValueError(
+                f"not enough operands for operator {symbol} at position {found.start(OPERATOR)}"
+            )
+
+        while pending:
+            symbol, _, opened = pending.pop()
+            if symbol == "(":
+                position = _match_at(expression, symbols, opened).start(LPAREN)
+                raise ValueError(f"unbalanced ( at position {position}")
+            _emit(output, symbol)
+
+        return tuple(output)
+
+    def _get_program(self, expression):
+        programs = self._programs
+        program = programs.get(expression)
+        if program is not None:
+            programs.move_to_end(expression)
+            return program
+        program = self.compile(expression)
+        if self.cache_size:
+            programs[expression] = program
+            if len(programs) > self.cache_size:
+                programs.popitem(last=False)
+        return program
+
+    def _run(self, program, variables=None):
+        if len(program) == 1 and program[0].__class__ is float:
+            return program[0]
+        operators = self.operators
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for step in program:
+            if step.__class__ is float:
+                push(step)
+            elif step.__class__ is Variable:
+                push(float(self._lookup(variables, step)))
+            elif step.__class__ is Unary:
+                push(-pop())
+            else:
+                b = pop()
+                push(operators[step](pop(), b))
+        return stack[0]
+
+    @staticmethod
+    def _lookup(variables, name):
+        try:
+            return variables[name]
+        except (KeyError, TypeError, ValueError, IndexError):
+            raise ValueError(f"unknown variable: {name}")
 
     def _evaluate_infix(self, tokens):
         values = []
@@ -1,8 +1,14 @@
-def render(expression, result):
+import sys
+
+
+def format_result(result):
     if isinstance(result, float) and result.is_integer():
-        result_str = str(int(result))
-    else:
-        result_str = str(result)
+        return str(int(result))
+    return str(result)
+
+
+def render(expression, result):
+    result_str = format_result(result)
 
     box_width = max(len(expression), len(result_str)) + 4
 
@@ -19,3 +25,33 @@ def render(expression, result):
     )
     box.append("└" + "─" * box_width + "┘")
     return "\n".join(box)
+
+
+def render_table(rows, out=None, plain=False, batch_size=4096):
+    """
+    Render (expression, result) pairs as one aligned table written to `out`
+    (default stdout). Column widths come from a single pass over all rows;
+    lines are then written in batches. plain=True writes tab-separated
+    `expression<TAB>result` lines with no borders, for piping.
+    """
+    out = out or sys.stdout
+    rows = [(expression, format_result(result)) for expression, result in rows]
+
+    if plain:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            out.write("".join(f"{expression}\t{result}\n" for expression, result in batch))
+        return
+
+    left = max((len(expression) for expression, _ in rows), default=0)
+    right = max((len(result) for _, result in rows), default=0)
+    out.write("┌" + "─" * (left + 2) + "┬" + "─" * (right + 2) + "┐\n")
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        out.write(
+            "".join(
+                f"│ {expression.ljust(left)} │ {result.ljust(right)} │\n"
+                for expression, result in batch
+            )
+        )
+    out.write("└" + "─" * (left + 2) + "┴" + "─" * (right + 2) + "┘\n")
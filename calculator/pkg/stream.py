@@ -0,0 +1,131 @@
+import asyncio
+import os
+import signal
+import sys
+
+from pkg.calculator import Calculator
+from pkg.render import format_result, render_table
+
+READ_SIZE = 64 * 1024
+
+
+class LineEvaluator:
+    """
+    Turns newline-delimited expressions into newline-delimited results, one
+    output line per input line, in order. Input may arrive in arbitrary chunks;
+    a trailing partial line is held until the next chunk (or finish()).
+    """
+
+    def __init__(self, calculator=None):
+        self.calculator = calculator or Calculator()
+        self._partial = b""
+
+    def feed(self, data):
+        return self._encode(self.feed_rows(data))
+
+    def finish(self):
+        return self._encode(self.finish_rows())
+
+    def feed_rows(self, data):
+        """Like feed(), but returns (expression, result) pairs for complete lines."""
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        return self._evaluate(lines)
+
+    def finish_rows(self):
+        if not self._partial.strip():
+            return []
+        lines, self._partial = [self._partial], b""
+        return self._evaluate(lines)
+
+    def _evaluate(self, lines):
+        evaluate = self.calculator.evaluate
+        rows = []
+        for line in lines:
+            expression = line.decode("utf-8", errors="replace").strip()
+            try:
+                result = evaluate(expression)
+                rows.append((expression, "" if result is None else result))
+            except Exception as e:
+                rows.append((expression, f"Error: {e}"))
+        return rows
+
+    @staticmethod
+    def _encode(rows):
+        if not rows:
+            return b""
+        lines = [format_result(result) for _, result in rows]
+        lines.append("")
+        return "\n".join(lines).encode("utf-8")
+
+
+def serve_stdin(stdin_fd=0, stdout=None, style=None):
+    """
+    Evaluate stdin line by line, writing one buffered batch per chunk read.
+    style="tsv" writes `expression<TAB>result` rows as they are evaluated;
+    style="table" reads everything first and prints one aligned table.
+    """
+    evaluator = LineEvaluator()
+    if style is not None:
+        stdout = stdout or sys.stdout
+        rows = []
+        while data := os.read(stdin_fd, READ_SIZE):
+            if style == "tsv":
+                render_table(evaluator.feed_rows(data), stdout, plain=True)
+                stdout.flush()
+            else:
+                rows.extend(evaluator.feed_rows(data))
+        rows.extend(evaluator.finish_rows())
+        render_table(rows, stdout, plain=style == "tsv")
+        stdout.flush()
+        return
+
+    stdout = stdout or sys.stdout.buffer
+    while data := os.read(stdin_fd, READ_SIZE):
+        output = evaluator.feed(data)
+        if output:
+            stdout.write(output)
+            stdout.flush()
+    stdout.write(evaluator.finish())
+    stdout.flush()
+
+
+async def _handle_connection(reader, writer, calculator):
+    evaluator = LineEvaluator(calculator)
+    try:
+        while data := await reader.read(READ_SIZE):
+            output = evaluator.feed(data)
+            if output:
+                writer.write(output)
+                await writer.drain()
+        writer.write(evaluator.finish())
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _serve_socket(path):
+    # One event loop, so every connection shares one Calculator (and its cache)
+    calculator = Calculator()
+    server = await asyncio.start_unix_server(
+        lambda r, w: _handle_connection(r, w, calculator), path=path
+    )
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    async with server:
+        await stop.wait()
+
+
+def serve_socket(path):
+    """Serve pipelined newline-delimited requests on a local Unix socket until SIGINT/SIGTERM."""
+    if os.path.exists(path):
+        os.unlink(path)
+    try:
+        asyncio.run(_serve_socket(path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
@@ -1,5 +1,8 @@
+import io
 import unittest
-from pkg.calculator import Calculator
+from pkg.calculator import Calculator, np, tokenize
+from pkg.render import render, render_table
+from pkg.stream import LineEvaluator
 
 
 class TestCalculator(unittest.TestCase):
@@ -42,6 +45,186 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calculator.evaluate("+ 3")
 
+    def test_repeated_expression_uses_cached_program(self):
+        self.assertEqual(self.calculator.evaluate("2 * 3 + 1"), 7)
+        program = self.calculator._programs["2 * 3 + 1"]
+        self.assertEqual(self.calculator.evaluate("2 * 3 + 1"), 7)
+        self.assertIs(self.calculator._programs["2 * 3 + 1"], program)
+
+    def test_cache_is_bounded(self):
+        calculator = Calculator(cache_size=2)
+        for expression in ("1 + 1", "2 + 2", "3 + 3"):
+            calculator.evaluate(expression)
+        self.assertEqual(list(calculator._programs), ["2 + 2", "3 + 3"])
+
+    def test_compile_matches_infix_evaluation(self):
+        expression = "2 * 3 - 8 / 2 + 5"
+        self.assertEqual(
+            self.calculator.compile(expression),
+            (2.0, 3.0, "*", 8.0, 2.0, "/", "-", 5.0, "+"),
+        )
+        self.assertEqual(
+            self.calculator.evaluate(expression),
+            self.calculator._evaluate_infix(expression.split()),
+        )
+
+    def test_evaluate_many(self):
+        results = self.calculator.evaluate_many(["3 + 5", "", "3 + 5", "10 / 4"])
+        self.assertEqual(results, [8, None, 8, 2.5])
+
+    def test_evaluate_many_invalid_expression(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_many(["1 + 1", "3 5"])
+
+    def test_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate("1 / 0")
+
+    def test_variables(self):
+        result = self.calculator.evaluate(
+            "price * qty - discount", {"price": 2.5, "qty": 4, "discount": 1}
+        )
+        self.assertEqual(result, 9)
+
+    def test_unknown_variable(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("price * 2", {})
+
+    def test_unspaced_expression(self):
+        self.assertEqual(self.calculator.evaluate("3+5*2"), 13)
+
+    def test_parentheses(self):
+        self.assertEqual(self.calculator.evaluate("(2 + 3) * 4"), 20)
+        self.assertEqual(self.calculator.evaluate("2*((1+2)-(3-4))"), 8)
+
+    def test_unary_minus(self):
+        self.assertEqual(self.calculator.evaluate("-2*3"), -6)
+        self.assertEqual(self.calculator.evaluate("2*-3"), -6)
+        self.assertEqual(self.calculator.evaluate("-(1+2)"), -3)
+        self.assertEqual(self.calculator.evaluate("-x", {"x": 4}), -4)
+
+    def test_scientific_notation(self):
+        self.assertEqual(self.calculator.evaluate("1.5e3/3"), 500)
+        self.assertEqual(self.calculator.evaluate("2E-1*10"), 2)
+
+    def test_error_reports_position(self):
+        with self.assertRaisesRegex(ValueError, "position 2"):
+            self.calculator.evaluate("3+$")
+        with self.assertRaisesRegex(ValueError, "unbalanced \\( at position 0"):
+            self.calculator.evaluate("(3+4")
+
+    def test_spaced_and_unspaced_input_compile_alike(self):
+        program = self.calculator.compile("2 * (x + 1) - 1.5e-3 * -y")
+        self.assertEqual(self.calculator.compile("2*(x+1)-1.5e-3*-y"), program)
+        self.assertEqual(self.calculator.compile("2 * (x+1) - 1.5e-3*-y"), program)
+
+    def test_chunks_of_several_tokens_are_not_memoized(self):
+        from pkg.calculator import _lexicon
+
+        self.assertEqual(self.calculator.evaluate("1 + 20*30"), 601)
+        known = _lexicon(tuple(self.calculator.operators))[1]
+        self.assertNotIn("20*30", known)
+        self.assertIn("30", known)
+
+    def test_spaced_input_reports_positions(self):
+        with self.assertRaisesRegex(ValueError, "invalid token: \\$ at position 4"):
+            self.calculator.evaluate("3 + $")
+        with self.assertRaisesRegex(ValueError, "unbalanced \\) at position 6"):
+            self.calculator.evaluate("1 + 2 )")
+        with self.assertRaisesRegex(ValueError, "operator \\* at position 2"):
+            self.calculator.evaluate("1 * ")
+
+    def test_tokenize(self):
+        self.assertEqual(
+            list(tokenize("a*(2.5e-1+ b)")),
+            [
+                ("name", "a", 0),
+                ("operator", "*", 1),
+                ("lparen", "(", 2),
+                ("number", "2.5e-1", 3),
+                ("operator", "+", 9),
+                ("name", "b", 11),
+                ("rparen", ")", 12),
+            ],
+        )
+
+
+class TestLineEvaluator(unittest.TestCase):
+    def test_one_output_line_per_input_line(self):
+        evaluator = LineEvaluator()
+        output = evaluator.feed(b"3 + 5\n\n1 / 0\n10 / 4\n")
+        self.assertEqual(
+            output, b"8\n\nError: float division by zero\n2.5\n"
+        )
+
+    def test_partial_lines_across_chunks(self):
+        evaluator = LineEvaluator()
+        self.assertEqual(evaluator.feed(b"2 *"), b"")
+        self.assertEqual(evaluator.feed(b" 3\n4 +"), b"6\n")
+        self.assertEqual(evaluator.feed(b" 1"), b"")
+        self.assertEqual(evaluator.finish(), b"5\n")
+
+
+class TestRenderTable(unittest.TestCase):
+    def test_aligned_table(self):
+        out = io.StringIO()
+        render_table([("3 + 5", 8.0), ("10 / 4", 2.5)], out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "┌────────┬─────┐",
+                "│ 3 + 5  │ 8   │",
+                "│ 10 / 4 │ 2.5 │",
+                "└────────┴─────┘",
+            ],
+        )
+
+    def test_plain_matches_render_formatting(self):
+        out = io.StringIO()
+        render_table([("3 + 5", 8.0), ("1 / 0", "Error: float division by zero")], out, plain=True)
+        self.assertEqual(out.getvalue(), "3 + 5\t8\n1 / 0\tError: float division by zero\n")
+        self.assertIn("│  8", render("3 + 5", 8.0))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestCalculatorColumns(unittest.TestCase):
+    def setUp(self):
+        self.calculator = Calculator()
+
+    def test_matches_scalar_path(self):
+        columns = {"price": [2.5, 3.0, 10.0], "qty": [4, 1, 0], "discount": [1, 0, 2]}
+        result = self.calculator.evaluate_columns("price * qty - discount / 2", columns)
+        expected = [
+            self.calculator.evaluate(
+                "price * qty - discount / 2",
+                {name: values[row] for name, values in columns.items()},
+            )
+            for row in range(3)
+        ]
+        self.assertEqual(result.tolist(), expected)
+
+    def test_inputs_are_not_modified(self):
+        price = np.array([1.0, 2.0])
+        result = self.calculator.evaluate_columns("price", {"price": price})
+        result += 1
+        self.assertEqual(price.tolist(), [1.0, 2.0])
+
+    def test_constant_expression_fills_rows(self):
+        result = self.calculator.evaluate_columns("3 + 5", {"x": np.zeros(4)})
+        self.assertEqual(result.tolist(), [8.0] * 4)
+
+    def test_division_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            self.calculator.evaluate_columns("a / b", {"a": [1, 2], "b": [1, 0]})
+
+    def test_unary_minus_over_columns(self):
+        result = self.calculator.evaluate_columns("-(a - 1)", {"a": [1, 2, 3]})
+        self.assertEqual(result.tolist(), [0.0, -1.0, -2.0])
+
+    def test_missing_column(self):
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_columns("a + b", {"a": [1]})
+
 
 if __name__ == "__main__":
     unittest.main()
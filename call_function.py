@@ -1,59 +1,129 @@
 # call_function.py
-from google.genai import types
-from functions.get_files_info import get_files_info
-from functions.get_file_content import get_file_content
-from functions.run_python import run_python_file as run_python  # ✅ alias fixed
-from functions.write_file_content import write_file
-from config import WORKING_DIR
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functions.registry import get_tool
+from functions.safe_path import PROJECT_ROOT
+from functions.sandbox_fs import get_sandbox
+from functions.tool_cache import tool_cache
+from config import WORKING_DIR, MAX_TOOL_WORKERS, BLOCKED_FILES
+from metrics import tool_metrics
 
+_executor = None
 
-def call_function(function_call_part, verbose=False, dry_run=True):
-    """Dispatch function calls safely with optional dry_run mode."""
+
+def is_blocked_path(target, working_directory):
+    """True when `target` resolves to one of the agent's own BLOCKED_FILES."""
+    if not target:
+        return False
+    try:
+        abs_target = get_sandbox(working_directory).resolve(target)
+    except (ValueError, TypeError):
+        return False  # outside the sandbox; the tool itself refuses it
+    return any(
+        abs_target == os.path.realpath(os.path.join(PROJECT_ROOT, name))
+        for name in BLOCKED_FILES
+    )
+
+
+def _cached_read(tool, target, args, verbose):
+    """Run a read-only tool through tool_cache; returns (result, cache_hit)."""
+    fs = get_sandbox(args["working_directory"])
+    try:
+        abs_target = fs.resolve(target)
+    except (ValueError, TypeError):
+        return tool.function(**args), False
+
+    result, hit = tool_cache.get_or_call(
+        tool.name,
+        abs_target,
+        args,
+        lambda: tool.function(**args),
+        file_fingerprint=fs.fingerprint(abs_target),
+    )
+    if verbose and hit:
+        print(f"   (cache hit: {tool.name} {target})")
+    return result, hit
+
+
+def _mark_search_stale(working_directory):
+    # The search index only exists once search_code has been imported and used
+    search_code = sys.modules.get("functions.search_code")
+    if search_code is not None:
+        search_code.mark_stale(working_directory)
+
+
+def _run_unsafe(tool, args, dry_run):
+    blocked, action = tool.unsafe
+    target = args.get("file_path") or args.get("filename")
+    if is_blocked_path(target, args.get("working_directory")):
+        return f"❌ Access denied: {target} is protected."
+    if dry_run:
+        return f"❌ {blocked} blocked (safe mode enabled)."
+    try:
+        output = tool.function(**args)
+    finally:
+        if tool.invalidates == "all":
+            tool_cache.clear()
+        elif tool.invalidates == "path" and target:
+            try:
+                tool_cache.invalidate(get_sandbox(args["working_directory"]).resolve(target))
+            except (ValueError, TypeError):
+                pass  # rejected by the tool before it touched anything
+        _mark_search_stale(args["working_directory"])
+    return f"⚠️ Unsafe action: {action}.\n{output}"
+
+
+def _dispatch(tool, function_name, args, verbose, dry_run):
+    """Run one tool call as its registry entry describes; returns (result, cache_hit)."""
+    if tool is None:
+        return {"error": f"Unknown function: {function_name}"}, False
+    if tool.unsafe:
+        return _run_unsafe(tool, args, dry_run), False
+    if tool.cache_arg:
+        return _cached_read(tool, args.get(tool.cache_arg), args, verbose)
+    return tool.function(**args), False
+
+
+def call_function(
+    function_call_part, verbose=False, dry_run=True, span=None, working_directory=None
+):
+    """
+    Dispatch function calls safely with optional dry_run mode. Tools run in
+    `working_directory` (default WORKING_DIR). When a tracing span is given,
+    the call's duration and payload sizes are added to it.
+    """
     if verbose:
         print(f"Calling function: {function_call_part.name}({function_call_part.args})")
     else:
         print(f" - Calling function: {function_call_part.name}")
 
+    from google.genai import types
+
     function_name = function_call_part.name
     args = dict(function_call_part.args)
-    args["working_directory"] = WORKING_DIR
-
-    result = None
+    tool = get_tool(function_name)
+    bytes_in = len(json.dumps(args, default=str))
+    args["working_directory"] = working_directory or WORKING_DIR
 
+    hit = False
+    start, cpu_start = time.perf_counter(), time.thread_time()
     try:
-        if function_name == "get_files_info":
-            result = get_files_info(**args)
-
-        elif function_name == "get_file_content":
-            result = get_file_content(**args)
-
-        elif function_name == "write_file_content":
-            target = args.get("file_path") or args.get("filename")
-            if is_blocked_path(target, args.get("working_directory")):
-                result = f"❌ Access denied: {target} is protected."
-            elif dry_run:
-                result = "❌ Write blocked (safe mode enabled)."
-            else:
-                warning = "⚠️ Unsafe action: writing to a file."
-                file_result = write_file_content(**args)
-                result = f"{warning}\n{file_result}"
-
-        elif function_name == "run_python":
-            target = args.get("file_path") or args.get("filename")
-            if is_blocked_path(target, args.get("working_directory")):
-                result = f"❌ Access denied: {target} is protected."
-            elif dry_run:
-                result = "❌ Execution blocked (safe mode enabled)."
-            else:
-                warning = "⚠️ Unsafe action: executing Python code."
-                exec_result = run_python(**args)
-                result = f"{warning}\n{exec_result}"
-
-        else:
-            result = {"error": f"Unknown function: {function_name}"}
-
+        result, hit = _dispatch(tool, function_name, args, verbose, dry_run)
     except Exception as e:
         result = {"error": f"Exception in {function_name}: {e}"}
+    wall, cpu = time.perf_counter() - start, time.thread_time() - cpu_start
+
+    bytes_out = len(str(result).encode("utf-8"))
+    # CPU time is this thread's only; run_python_file's child process is not included
+    tool_metrics.record(
+        tool.name if tool else function_name, wall, cpu, bytes_in, bytes_out, cache_hit=hit
+    )
+    if span is not None:
+        error = result.get("error") if isinstance(result, dict) else None
+        span.add_tool_call(function_name, wall, bytes_in, bytes_out, hit, error)
 
     return types.Content(
         role="tool",
@@ -66,73 +136,72 @@ def call_function(function_call_part, verbose=False, dry_run=True):
     )
 
 
-# Available tool declarations for Gemini
-available_functions = types.Tool(
-    function_declarations=[
-        types.FunctionDeclaration(
-            name="get_files_info",
-            description="List files in a directory",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "directory": types.Schema(
-                        type=types.Type.STRING,
-                        description="The directory to list files from, relative to the working directory.",
-                    )
-                },
-                required=["directory"],
-            ),
-        ),
-        types.FunctionDeclaration(
-            name="get_file_content",
-            description="Read contents of a file",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "file_path": types.Schema(
-                        type=types.Type.STRING,
-                        description="Path to the file to read, relative to the working directory.",
-                    )
-                },
-                required=["file_path"],
-            ),
-        ),
-        types.FunctionDeclaration(
-            name="write_file_content",
-            description="Write/overwrite a file (UNSAFE)",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "file_path": types.Schema(
-                        type=types.Type.STRING,
-                        description="Path to the file to write.",
-                    ),
-                    "content": types.Schema(
-                        type=types.Type.STRING,
-                        description="Content to write to the file.",
-                    ),
-                },
-                required=["file_path", "content"],
-            ),
-        ),
-        types.FunctionDeclaration(
-            name="run_python",
-            description="Execute a Python file with optional args (UNSAFE)",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "file_path": types.Schema(
-                        type=types.Type.STRING,
-                        description="Path to the Python file to execute.",
-                    ),
-                    "args": types.Schema(
-                        type=types.Type.ARRAY,
-                        items=types.Schema(type=types.Type.STRING),
-                        description="Optional arguments to pass to the Python file.",
-                    ),
-                },
-                required=["file_path"],
-            ),
-        ),
-    ]
-)
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MAX_TOOL_WORKERS, thread_name_prefix="koala-tool"
+        )
+    return _executor
+
+
+class ToolDispatcher:
+    """
+    Dispatches one model turn's function calls as they become known.
+    Runs of consecutive read-only calls execute concurrently on a bounded pool;
+    writes and executions wait for earlier calls and run alone, in order.
+    finish() returns the results in the order the calls were submitted.
+    """
+
+    def __init__(self, verbose=False, dry_run=True, span=None, working_directory=None):
+        self.verbose = verbose
+        self.dry_run = dry_run
+        self.span = span
+        self.working_directory = working_directory
+        self._results = []
+        self._pending = []
+        # Files may have changed outside the agent since the last turn
+        get_sandbox(working_directory or WORKING_DIR).invalidate()
+
+    def submit(self, function_call_part):
+        index = len(self._results)
+        self._results.append(None)
+        tool = get_tool(function_call_part.name)
+        if tool is not None and tool.read_only:
+            future = _get_executor().submit(
+                call_function,
+                function_call_part,
+                self.verbose,
+                self.dry_run,
+                self.span,
+                self.working_directory,
+            )
+            self._pending.append((index, future))
+        else:
+            self._drain()
+            self._results[index] = call_function(
+                function_call_part,
+                verbose=self.verbose,
+                dry_run=self.dry_run,
+                span=self.span,
+                working_directory=self.working_directory,
+            )
+
+    def _drain(self):
+        for index, future in self._pending:
+            self._results[index] = future.result()
+        self._pending.clear()
+
+    def finish(self):
+        self._drain()
+        return self._results
+
+
+def call_functions(
+    function_call_parts, verbose=False, dry_run=True, span=None, working_directory=None
+):
+    """Dispatch every function call from one model turn (see ToolDispatcher)."""
+    dispatcher = ToolDispatcher(verbose, dry_run, span, working_directory)
+    for function_call_part in function_call_parts:
+        dispatcher.submit(function_call_part)
+    return dispatcher.finish()
@@ -0,0 +1,85 @@
+# cassette.py
+import json
+import time
+
+
+class RecordingClient:
+    """
+    Wraps a real genai.Client and appends every generate_content request and
+    response to a JSONL cassette, one interaction per line, so the session can
+    be replayed later without the network. close() it when the session ends.
+    """
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self.models = _RecordingModels(client.models, path)
+        # Context caches are not part of the cassette; they go straight to the API
+        self.caches = client.caches
+
+    def close(self):
+        self.models.close()
+
+
+class _RecordingModels:
+    def __init__(self, models, path):
+        self._models = models
+        self._file = open(path, "w", encoding="utf-8")
+
+    def generate_content(self, *, model, contents, config=None):
+        start = time.perf_counter()
+        response = self._models.generate_content(model=model, contents=contents, config=config)
+        elapsed = time.perf_counter() - start
+        interaction = {
+            "request": {
+                "model": model,
+                "contents": [
+                    content.model_dump(mode="json", exclude_none=True) for content in contents
+                ],
+            },
+            "response": response.model_dump(mode="json", exclude_none=True),
+            "elapsed": round(elapsed, 6),
+        }
+        self._file.write(json.dumps(interaction) + "\n")
+        self._file.flush()
+        return response
+
+    def close(self):
+        self._file.close()
+
+
+class ReplayClient:
+    """
+    Stands in for genai.Client by serving the responses from a cassette in
+    order. `latency` adds a fixed delay in seconds per call, or replays the
+    recorded model latency when set to "recorded".
+    """
+
+    def __init__(self, path, latency=None):
+        self.path = path
+        self.models = _ReplayModels(path, latency)
+
+
+class _ReplayModels:
+    def __init__(self, path, latency):
+        with open(path, encoding="utf-8") as f:
+            self._interactions = [json.loads(line) for line in f if line.strip()]
+        self._latency = latency
+        self.calls = 0
+        self.latency_total = 0.0
+
+    def generate_content(self, *, model, contents, config=None):
+        if self.calls >= len(self._interactions):
+            raise RuntimeError(
+                f"Cassette exhausted after {self.calls} responses; re-record it with --record"
+            )
+        interaction = self._interactions[self.calls]
+        self.calls += 1
+
+        delay = interaction.get("elapsed", 0.0) if self._latency == "recorded" else self._latency
+        if delay:
+            time.sleep(delay)
+            self.latency_total += delay
+        from google.genai import types
+
+        return types.GenerateContentResponse.model_validate(interaction["response"])
@@ -3,6 +3,79 @@ MAX_CHARS = 10000
 WORKING_DIR = "./calculator"
 MAX_ITERS = 20
 
+# Upper bound on read-only tool calls run concurrently within one model turn
+MAX_TOOL_WORKERS = 8
+
+# Number of file-reading tool results (get_file_content, outlines) kept in the tool cache
+TOOL_CACHE_SIZE = 256
+
+# Maximum entries get_files_info returns before handing back a cursor
+LIST_PAGE_SIZE = 500
+
+# search_code index: where it lives (relative to the project root), the largest
+# file it indexes, and how often (seconds) it re-checks file mtimes
+SEARCH_INDEX_DIR = ".koala_cache"
+SEARCH_MAX_FILE_BYTES = 1_000_000
+SEARCH_REFRESH_INTERVAL = 2.0
+
+# Conversation history: estimated token budget, how many trailing messages are
+# never compacted, and the smallest tool result worth replacing with a stub
+HISTORY_TOKEN_BUDGET = 100_000
+HISTORY_KEEP_RECENT = 4
+HISTORY_STUB_MIN_TOKENS = 200
+
+# Warm run_python workers (enable with PYTHON_WORKER_POOL=<n>): modules each
+# worker imports ahead of time
+PYTHON_POOL_PREIMPORTS = ("unittest",)
+
+# Address-space cap applied to every script run_python starts, warm or cold
+RUN_PYTHON_MAX_MEMORY_MB = 1024
+
+# run_python keeps at most this many bytes from the start and from the end of
+# each of stdout/stderr; the middle is dropped and only counted
+RUN_OUTPUT_HEAD_BYTES = 4000
+RUN_OUTPUT_TAIL_BYTES = 4000
+
+# --session NAME keeps its history under SESSION_DIR; tool payloads of at
+# least SESSION_BLOB_MIN_BYTES are stored once, by content hash, in SESSION_BLOB_DIR
+SESSION_DIR = ".koala_cache/sessions"
+SESSION_BLOB_DIR = ".koala_cache/blobs"
+SESSION_BLOB_MIN_BYTES = 1024
+
+# Lifetime of the model-side context cache created by --cache-context
+CONTEXT_CACHE_TTL_SECONDS = 3600
+
+# Model calls: overall deadline per call (seconds, retries included), retry
+# budget and backoff bounds for 429/5xx/network errors
+MODEL_CALL_DEADLINE = 120.0
+MODEL_MAX_RETRIES = 5
+MODEL_BACKOFF_BASE = 0.5
+MODEL_BACKOFF_MAX = 30.0
+
+# The shared client stops calling the API for CIRCUIT_RESET_SECONDS after
+# this many consecutive failed attempts
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+# HTTP connections kept by the one shared client
+MODEL_MAX_CONNECTIONS = 16
+
+# --batch defaults: sessions in flight, and requests/tokens per minute (0 = no limit)
+BATCH_CONCURRENCY = 4
+BATCH_REQUESTS_PER_MINUTE = 60
+BATCH_TOKENS_PER_MINUTE = 1_000_000
+
+# `python -m benchmarks --baseline` fails when a case gets this much slower
+BENCH_REGRESSION_THRESHOLD = 0.25
+
+# Resolved paths and stat results each sandbox remembers between invalidations
+SANDBOX_MEMO_SIZE = 4096
+
+# get_file_outline/read_symbol refuse to parse Python files larger than this,
+# and keep the outlines of at most OUTLINE_CACHE_SIZE files
+OUTLINE_MAX_FILE_BYTES = 2_000_000
+OUTLINE_CACHE_SIZE = 512
+
 # List of files the AI should never modify/execute
 BLOCKED_FILES = {
     "main.py",
@@ -0,0 +1,92 @@
+# context_cache.py
+import datetime
+import hashlib
+import json
+
+from config import CONTEXT_CACHE_TTL_SECONDS, WORKING_DIR
+from functions.registry import TOOLS, tool_declarations
+from functions.safe_path import safe_path
+
+# Recreate the cache rather than use one about to expire mid-session
+_MIN_REMAINING = datetime.timedelta(minutes=5)
+
+
+def _read_pinned(paths, working_directory):
+    pinned = []
+    for path in paths:
+        with open(safe_path(path, working_directory), encoding="utf-8", errors="replace") as f:
+            pinned.append((path, f.read()))
+    return pinned
+
+
+def _fingerprint(model, system_instruction, pinned):
+    stable = {
+        "model": model,
+        "system_instruction": system_instruction,
+        "tools": [entry.schema for entry in TOOLS.values()],
+        "pinned": pinned,
+    }
+    return hashlib.sha256(json.dumps(stable, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _still_valid(client, previous, fingerprint):
+    if not previous or previous.get("fingerprint") != fingerprint:
+        return False
+    expires = datetime.datetime.fromisoformat(previous["expire_time"])
+    if expires - datetime.datetime.now(datetime.timezone.utc) < _MIN_REMAINING:
+        return False
+    try:
+        client.caches.get(name=previous["name"])
+    except Exception:
+        return False
+    return True
+
+
+def get_cached_context(
+    client, model, system_instruction, pinned_paths=(), previous=None, working_directory=WORKING_DIR
+):
+    """
+    A model-side cache holding the stable prefix of every request: the system
+    instruction, the tool declarations and any pinned files. Returns
+    {"name", "expire_time", "fingerprint"} (reusing `previous` when it still
+    matches and is live), or None if the API refuses to create one.
+    """
+    from google.genai import types
+
+    pinned = _read_pinned(pinned_paths, working_directory)
+    fingerprint = _fingerprint(model, system_instruction, pinned)
+    if _still_valid(client, previous, fingerprint):
+        return previous
+
+    contents = None
+    if pinned:
+        contents = [
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part.from_text(text=f"Pinned file {path}:\n{text}")
+                    for path, text in pinned
+                ],
+            )
+        ]
+    try:
+        cache = client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_instruction,
+                tools=[tool_declarations()],
+                contents=contents,
+                ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+                display_name="killer-koala",
+            ),
+        )
+    except Exception as e:
+        # e.g. the prefix is below the model's minimum cacheable size
+        print(f"Context cache unavailable, sending the full prefix instead: {e}")
+        return None
+
+    expire_time = cache.expire_time or (
+        datetime.datetime.now(datetime.timezone.utc)
+        + datetime.timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS)
+    )
+    return {"name": cache.name, "expire_time": expire_time.isoformat(), "fingerprint": fingerprint}
@@ -0,0 +1,268 @@
+# fake_gemini.py
+"""
+A local stand-in for the Gemini REST endpoint, for exercising the agent loop
+(batch mode, retries, sessions) without network access or an API key.
+
+Every conversation follows the same script: the first turn asks for
+get_files_info on "."; once the request carries tool results, the reply is a
+short text answer. streamGenerateContent sends the same reply as server-sent
+events, the text a few words per event. Context caches (cachedContents) are
+kept in memory and reported back as cached tokens. Point the agent at it with --base-url:
+
+    python fake_gemini.py --port 8765 &
+    GEMINI_API_KEY=fake python main.py --base-url http://127.0.0.1:8765 "hi"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _last_parts(request):
+    contents = request.get("contents") or []
+    return contents[-1].get("parts", []) if contents else []
+
+
+def scripted_reply(request, cached_tokens=0):
+    """The response body for one generateContent request."""
+    tool_results = [p["functionResponse"] for p in _last_parts(request) if "functionResponse" in p]
+    if tool_results:
+        result = str(tool_results[0].get("response", {}).get("result", ""))
+        parts = [{"text": f"Done: {len(tool_results)} tool result(s), first was {len(result)} chars."}]
+    else:
+        parts = [{"functionCall": {"name": "get_files_info", "args": {"directory": "."}}}]
+    prompt_tokens = len(json.dumps(request)) // 4 + cached_tokens
+    usage = {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": 8,
+        "totalTokenCount": prompt_tokens + 8,
+    }
+    if cached_tokens:
+        usage["cachedContentTokenCount"] = cached_tokens
+    return {
+        "candidates": [
+            {"content": {"role": "model", "parts": parts}, "finishReason": "STOP", "index": 0}
+        ],
+        "usageMetadata": usage,
+    }
+
+
+def scripted_stream(request, cached_tokens=0, words_per_chunk=3):
+    """The streamGenerateContent events for one request; usage rides on the last."""
+    reply = scripted_reply(request, cached_tokens)
+    candidate = reply["candidates"][0]
+    part = candidate["content"]["parts"][0]
+    if "text" not in part:
+        return [reply]
+    words = part["text"].split(" ")
+    pieces = [
+        " ".join(words[i : i + words_per_chunk]) + (" " if i + words_per_chunk < len(words) else "")
+        for i in range(0, len(words), words_per_chunk)
+    ]
+    events = [
+        {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}]}
+        for piece in pieces
+    ]
+    events[-1] = reply | {
+        "candidates": [dict(candidate, content={"role": "model", "parts": [{"text": pieces[-1]}]})]
+    }
+    return events
+
+
+class FakeGeminiServer:
+    """
+    Serves scripted replies on 127.0.0.1 from a background thread. `latency`
+    delays every reply (seconds) and `chunk_interval` separates streamed
+    events. Errors can be injected: the first `fail_first` requests, and then
+    a random `error_rate` fraction of them, get `error_status`, with a Retry-After header when `retry_after` is set.
+    The first `empty_streams` streamed replies end without sending an event.
+    Use as a context manager or start()/stop().
+    """
+
+    def __init__(
+        self,
+        port=0,
+        latency=0.0,
+        error_rate=0.0,
+        error_status=503,
+        retry_after=None,
+        fail_first=0,
+        seed=0,
+        chunk_interval=0.05,
+        empty_streams=0,
+    ):
+        self.latency = latency
+        self.chunk_interval = chunk_interval
+        self.empty_streams = empty_streams
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.caches = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _should_fail(self):
+        with self._lock:
+            self.requests += 1
+            fail = self.requests <= self.fail_first or self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+    def _take_empty_stream(self):
+        with self._lock:
+            if self.empty_streams <= 0:
+                return False
+            self.empty_streams -= 1
+            return True
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fail = server._should_fail()
+                if server.latency:
+                    time.sleep(server.latency)
+                if fail:
+                    headers = {}
+                    if server.retry_after is not None:
+                        headers["Retry-After"] = str(server.retry_after)
+                    error = {"code": server.error_status, "message": "injected error", "status": "UNAVAILABLE"}
+                    return self._send(server.error_status, {"error": error}, headers)
+                request = json.loads(body or b"{}")
+                if self.path.split("?")[0].endswith("/cachedContents"):
+                    return self._send(200, server._create_cache(request))
+                streaming = ":streamGenerateContent" in self.path
+                if not streaming and ":generateContent" not in self.path:
+                    return self._not_found()
+                cache = server.caches.get(request.get("cachedContent"))
+                if request.get("cachedContent") and cache is None:
+                    return self._not_found()
+                cached_tokens = cache["usageMetadata"]["totalTokenCount"] if cache else 0
+                if streaming:
+                    if server._take_empty_stream():
+                        return self._send_events([])
+                    return self._send_events(scripted_stream(request, cached_tokens))
+                self._send(200, scripted_reply(request, cached_tokens))
+
+            def do_GET(self):
+                name = self.path.split("?")[0].split("/", 2)[-1]
+                if name in server.caches:
+                    return self._send(200, server.caches[name])
+                self._not_found()
+
+            def _not_found(self):
+                self._send(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (e.g. its deadline passed)
+
+            def _send_events(self, events):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for number, event in enumerate(events):
+                    if number:
+                        time.sleep(server.chunk_interval)
+                    data = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+                    self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        return Handler
+
+    def _create_cache(self, request):
+        with self._lock:
+            name = f"cachedContents/fake{len(self.caches) + 1}"
+            ttl = float(request.get("ttl", "3600s").rstrip("s"))
+            expire = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + ttl))
+            self.caches[name] = {
+                "name": name,
+                "model": request.get("model"),
+                "expireTime": expire,
+                "usageMetadata": {"totalTokenCount": len(json.dumps(request)) // 4},
+            }
+            return self.caches[name]
+
+    def start(self):
+        # A short poll interval keeps stop() quick
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each reply")
+    parser.add_argument("--chunk-interval", type=float, default=0.05, help="Seconds between streamed events")
+    parser.add_argument("--empty-streams", type=int, default=0, help="End this many streamed replies without an event")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for injected errors")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with injected errors")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail this many requests before anything else")
+    args = parser.parse_args()
+    server = FakeGeminiServer(
+        args.port,
+        args.latency,
+        args.error_rate,
+        args.error_status,
+        args.retry_after,
+        args.fail_first,
+        chunk_interval=args.chunk_interval,
+        empty_streams=args.empty_streams,
+    )
+    print(f"Fake Gemini endpoint on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
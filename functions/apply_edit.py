@@ -0,0 +1,254 @@
+# functions/apply_edit.py
+import hashlib
+import os
+import re
+import tempfile
+
+from functions.sandbox_fs import get_sandbox
+from functions.write_file_content import ALLOW_WRITES
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+class EditError(ValueError):
+    """An edit that does not apply to the file as it is now."""
+
+
+def _parse_diff(diff):
+    """Hunks of a single-file unified diff as [old line number, old lines, new lines, context]."""
+    hunks = []
+    current = None
+    for line in diff.splitlines():
+        if line.startswith(("---", "+++", "diff ", "index ")) and current is None:
+            continue
+        header = _HUNK_HEADER.match(line)
+        if header:
+            current = [int(header.group(1)), [], [], 0]
+            hunks.append(current)
+            continue
+        if current is None or line.startswith("\\"):
+            continue  # preamble, or "\ No newline at end of file"
+        tag, text = (line[0], line[1:]) if line else (" ", "")
+        if tag == " ":
+            current[3] += 1
+        if tag in " -":
+            current[1].append(text)
+        if tag in " +":
+            current[2].append(text)
+        if tag not in " -+":
+            raise EditError(f"Unexpected diff line: {line!r}")
+    if not hunks:
+        raise EditError("The diff has no @@ hunks")
+    return hunks
+
+
+def _find_block(lines, block, expected):
+    """
+    Index where `block` occurs in `lines`: at `expected` when it matches there,
+    else its only occurrence. Raises EditError when it is missing, or appears
+    several times but not where expected.
+    """
+    if not block:
+        return expected
+    first = block[0]
+    size = len(block)
+    matches = [
+        i
+        for i, line in enumerate(lines)
+        if line == first and lines[i : i + size] == block
+    ]
+    if expected in matches:
+        return expected
+    if not matches:
+        raise EditError("does not match the file")
+    if len(matches) > 1:
+        found = ", ".join(str(i + 1) for i in matches[:10])
+        raise EditError(
+            f"does not match at line {expected + 1} and its lines appear at {len(matches)} "
+            f"places ({found}); fix the @@ line numbers or add context"
+        )
+    return matches[0]
+
+
+def _apply_diff(lines, diff):
+    changes = []
+    drift = 0
+    for number, (old_start, old, new, context) in enumerate(_parse_diff(diff), start=1):
+        if old:
+            expected = old_start - 1 + drift
+        else:
+            # "-N,0" inserts after line N; a final "" is what follows the last newline
+            last = len(lines) - 1 if lines and lines[-1] == "" else len(lines)
+            expected = min(max(old_start + drift, 0), last)
+        try:
+            at = _find_block(lines, old, expected)
+        except EditError as e:
+            raise EditError(f"Hunk {number} (@@ -{old_start}) {e}") from None
+        lines[at : at + len(old)] = new
+        drift += len(new) - len(old)
+        moved_from = old_start if at != expected and old else None
+        changes.append((at + 1, len(old) - context, len(new) - context, moved_from))
+    return lines, changes
+
+
+def _line_count(text, newline):
+    return text.count(newline) + (0 if text.endswith(newline) else 1)
+
+
+def _apply_replacements(text, edits, newline):
+    changes = []
+    for number, edit in enumerate(edits, start=1):
+        search, replace = edit.get("search"), edit.get("replace")
+        if not search or replace is None:
+            raise EditError(f"Edit {number} needs a non-empty 'search' and a 'replace'")
+        search = search.replace("\n", newline)
+        replace = replace.replace("\n", newline)
+        found = text.count(search)
+        if found != 1:
+            raise EditError(
+                f"Edit {number}: search text found {found} times; it must match exactly once"
+            )
+        at = text.index(search)
+        text = text[:at] + replace + text[at + len(search) :]
+        changes.append(
+            (
+                text.count(newline, 0, at) + 1,
+                _line_count(search, newline),
+                _line_count(replace, newline) if replace else 0,
+                None,
+            )
+        )
+    return text, changes
+
+
+def _write_atomic(abs_path, data, mode):
+    """Replace `abs_path` with `data` so readers see either the old or the new file."""
+    directory = os.path.dirname(abs_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".koala-edit-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, abs_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _summary(file_path, changes, digest, dry_run):
+    removed = sum(change[1] for change in changes)
+    added = sum(change[2] for change in changes)
+    verb = "[DryRun] Would edit" if dry_run else "Edited"
+    lines = [f'{verb} "{file_path}": {len(changes)} hunk(s), -{removed} +{added} lines']
+    for line, old, new, moved_from in changes:
+        moved = f" (the @@ header said line {moved_from})" if moved_from else ""
+        lines.append(f"  line {line}: -{old} +{new}{moved}")
+    lines.append(f"sha256 {digest}")
+    return "\n".join(lines)
+
+
+def apply_edit(
+    working_directory,
+    file_path,
+    diff=None,
+    edits=None,
+    expected_sha256=None,
+    dry_run: bool = False,
+):
+    try:
+        fs = get_sandbox(working_directory)
+        abs_file_path = fs.resolve(file_path)
+
+        if not ALLOW_WRITES:
+            return (
+                f"Error: Writing is disabled by default. "
+                f"Set ALLOW_WRITES=true in your environment to enable."
+            )
+        if not fs.isfile(abs_file_path):
+            return (
+                f'Error: File not found or is not a regular file: "{file_path}" '
+                f"(use write_file to create it)"
+            )
+        if (diff is None) == (edits is None):
+            return "Error: pass exactly one of 'diff' or 'edits'"
+
+        with open(abs_file_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != digest:
+            return (
+                f'Error: "{file_path}" changed since it was read (sha256 {digest}, '
+                f"expected {expected_sha256}); read it again before editing"
+            )
+        text = data.decode("utf-8")
+        newline = "\r\n" if "\r\n" in text else "\n"
+
+        if diff is not None:
+            lines, changes = _apply_diff(text.split(newline), diff)
+            text = newline.join(lines)
+        else:
+            text, changes = _apply_replacements(text, edits, newline)
+
+        new_data = text.encode("utf-8")
+        new_digest = hashlib.sha256(new_data).hexdigest()
+        if not dry_run:
+            try:
+                _write_atomic(abs_file_path, new_data, fs.stat(abs_file_path).st_mode)
+            finally:
+                fs.invalidate()
+        return _summary(file_path, changes, new_digest, dry_run)
+    except EditError as e:
+        return f'Error: edit not applied to "{file_path}": {e}'
+    except UnicodeDecodeError:
+        return f'Error: "{file_path}" is not UTF-8 text'
+    except Exception as e:
+        return f"Error: editing file: {e}"
+
+
+schema_apply_edit = {
+    "name": "apply_edit",
+    "description": (
+        "Changes part of an existing file without resending all of it, given either a "
+        "unified diff or a list of search/replace edits. The edit is checked against the "
+        "current content and written atomically; returns a short summary and the new "
+        "sha256 of the file. Only available in unsafe mode."
+    ),
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "file_path": {
+                "type": "STRING",
+                "description": "Path to the file to edit, relative to the working directory.",
+            },
+            "diff": {
+                "type": "STRING",
+                "description": "Unified diff of this one file (@@ hunks with context lines).",
+            },
+            "edits": {
+                "type": "ARRAY",
+                "description": "Search/replace edits applied in order; each search text must occur exactly once.",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "search": {"type": "STRING", "description": "Exact text to replace."},
+                        "replace": {"type": "STRING", "description": "Replacement text."},
+                    },
+                    "required": ["search", "replace"],
+                },
+            },
+            "expected_sha256": {
+                "type": "STRING",
+                "description": "sha256 returned by a previous apply_edit; the edit is refused if the file has changed since.",
+            },
+        },
+        "required": ["file_path"],
+    },
+}
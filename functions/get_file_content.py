@@ -1,38 +1,191 @@
-import os
-from google.genai import types
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
 from config import MAX_CHARS
-from functions.safe_path import safe_path
+from functions.sandbox_fs import get_sandbox
 
+# Number of files whose newline index is kept between calls
+LINE_INDEX_CACHE_SIZE = 32
+# Chunk size used when counting newlines over a whole mapping
+_COUNT_CHUNK = 1 << 20
 
-def get_file_content(working_directory, file_path):
+_line_indexes = OrderedDict()
+_index_lock = threading.Lock()
+
+
+class _LineIndex:
+    """Byte offsets of line starts in one file, extended only as far as requested."""
+
+    def __init__(self, file_fingerprint):
+        self.fingerprint = file_fingerprint
+        self.starts = array("Q", [0])
+        self.scanned = 0
+        self.total_lines = None
+
+    def ensure(self, mm, count):
+        """Make sure the first `count` line starts are known (or EOF was reached)."""
+        size = len(mm)
+        starts = self.starts
+        pos = self.scanned
+        while len(starts) < count and pos < size:
+            newline = mm.find(b"\n", pos)
+            if newline == -1:
+                pos = size
+                break
+            pos = newline + 1
+            starts.append(pos)
+        self.scanned = pos
+
+    def line_count(self, mm):
+        if self.total_lines is None:
+            size = len(mm)
+            count = 0
+            for pos in range(0, size, _COUNT_CHUNK):
+                count += mm[pos : pos + _COUNT_CHUNK].count(b"\n")
+            if size and mm[size - 1] != ord("\n"):
+                count += 1
+            self.total_lines = count
+        return self.total_lines
+
+
+def _get_line_index(fs, abs_file_path):
+    file_fingerprint = fs.fingerprint(abs_file_path)
+    index = _line_indexes.get(abs_file_path)
+    if index is None or index.fingerprint != file_fingerprint:
+        index = _LineIndex(file_fingerprint)
+        _line_indexes[abs_file_path] = index
+    _line_indexes.move_to_end(abs_file_path)
+    while len(_line_indexes) > LINE_INDEX_CACHE_SIZE:
+        _line_indexes.popitem(last=False)
+    return index
+
+
+def _read_lines(fs, mm, abs_file_path, start_line, end_line):
+    with _index_lock:
+        index = _get_line_index(fs, abs_file_path)
+        total_lines = index.line_count(mm)
+        start_line = max(1, start_line)
+        end_line = min(end_line, total_lines)
+        if start_line > end_line:
+            return b"", start_line, end_line, total_lines
+        index.ensure(mm, end_line + 1)
+        begin = index.starts[start_line - 1]
+        end = index.starts[end_line] if len(index.starts) > end_line else len(mm)
+    return mm[begin:end], start_line, end_line, total_lines
+
+
+def _read_range(
+    fs, abs_file_path, file_path, offset, length, start_line, end_line
+):
+    size = fs.getsize(abs_file_path)
+    if size == 0:
+        return f'[File "{file_path}" is empty: 0 bytes, 0 lines]'
+
+    with open(abs_file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        if start_line is not None or end_line is not None:
+            start_line = int(start_line) if start_line is not None else 1
+            end_line = int(end_line) if end_line is not None else start_line + 199
+            data, start_line, end_line, total_lines = _read_lines(
+                fs, mm, abs_file_path, start_line, end_line
+            )
+            shown = (
+                f"lines {start_line}-{end_line}"
+                if start_line <= end_line
+                else "no lines (start_line is past the end of the file)"
+            )
+            header = (
+                f'[File "{file_path}": {size} bytes, {total_lines} lines; '
+                f"showing {shown}]"
+            )
+        else:
+            offset = max(0, int(offset or 0))
+            length = MAX_CHARS if length is None else max(0, int(length))
+            length = min(length, MAX_CHARS)
+            data = mm[offset : offset + length]
+            with _index_lock:
+                total_lines = _get_line_index(fs, abs_file_path).line_count(mm)
+            header = (
+                f'[File "{file_path}": {size} bytes, {total_lines} lines; '
+                f"showing bytes {offset}-{offset + len(data)}]"
+            )
+
+    content = data.decode("utf-8", errors="replace")
+    if len(content) > MAX_CHARS:
+        content = content[:MAX_CHARS] + (
+            f'[...File "{file_path}" truncated at {MAX_CHARS} characters]'
+        )
+    return f"{header}\n{content}"
+
+
+def get_file_content(
+    working_directory,
+    file_path,
+    offset=None,
+    length=None,
+    start_line=None,
+    end_line=None,
+):
     try:
-        abs_file_path = safe_path(file_path, working_directory)
+        fs = get_sandbox(working_directory)
+        abs_file_path = fs.resolve(file_path)
 
-        if not os.path.isfile(abs_file_path):
+        if not fs.isfile(abs_file_path):
             return f'Error: File not found or is not a regular file: "{file_path}"'
 
+        if any(v is not None for v in (offset, length, start_line, end_line)):
+            return _read_range(
+                fs, abs_file_path, file_path, offset, length, start_line, end_line
+            )
+
         with open(abs_file_path, "r", encoding="utf-8") as f:
             content = f.read(MAX_CHARS)
-            if os.path.getsize(abs_file_path) > MAX_CHARS:
+            if f.read(1):
+                size = fs.getsize(abs_file_path)
                 content += (
-                    f'[...File "{file_path}" truncated at {MAX_CHARS} characters]'
+                    f'[...File "{file_path}" truncated at {MAX_CHARS} characters; '
+                    f"{size} bytes total. Use offset/length or start_line/end_line "
+                    f"to read further]"
                 )
         return content
     except Exception as e:
         return f'Error reading file "{file_path}": {e}"'
 
 
-schema_get_file_content = types.FunctionDeclaration(
-    name="get_file_content",
-    description=f"Reads and returns the first {MAX_CHARS} characters of the content from a specified file within the working directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="The path to the file whose content should be read, relative to the working directory.",
-            ),
-        },
-        required=["file_path"],
+schema_get_file_content = {
+    "name": "get_file_content",
+    "description": (
+        f"Reads a file within the working directory. Without a range it returns the first "
+        f"{MAX_CHARS} characters. Ranged reads start with a header giving the file's total "
+        f"size in bytes and line count, so large files can be paged through with "
+        f"offset/length or start_line/end_line."
     ),
-)
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "file_path": {
+                "type": "STRING",
+                "description": "Path to the file to read, relative to the working directory.",
+            },
+            "offset": {
+                "type": "INTEGER",
+                "description": "Byte offset to start reading from.",
+            },
+            "length": {
+                "type": "INTEGER",
+                "description": "Number of bytes to read from offset.",
+            },
+            "start_line": {
+                "type": "INTEGER",
+                "description": "First line to return, 1-based.",
+            },
+            "end_line": {
+                "type": "INTEGER",
+                "description": "Last line to return, inclusive.",
+            },
+        },
+        "required": ["file_path"],
+    },
+}
@@ -0,0 +1,216 @@
+# functions/get_file_outline.py
+import threading
+from collections import OrderedDict
+
+from config import OUTLINE_CACHE_SIZE, OUTLINE_MAX_FILE_BYTES
+from functions.sandbox_fs import get_sandbox
+
+_outlines = OrderedDict()  # abs path -> (fingerprint, symbols or error string), LRU
+_outlines_lock = threading.Lock()
+_prewarmed = set()
+
+
+class _Symbol:
+    __slots__ = ("name", "kind", "signature", "start", "end", "depth")
+
+    def __init__(self, name, kind, signature, start, end, depth):
+        self.name = name
+        self.kind = kind
+        self.signature = signature
+        self.start = start
+        self.end = end
+        self.depth = depth
+
+
+def _signature(node):
+    import ast
+
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases]
+        bases += [ast.unparse(keyword) for keyword in node.keywords]
+        return f"({', '.join(bases)})" if bases else ""
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"({ast.unparse(node.args)}){returns}"
+
+
+def _parse(abs_path):
+    """Every class and function in the file, outermost first, with qualified names."""
+    import ast
+
+    with open(abs_path, "rb") as f:
+        tree = ast.parse(f.read(), filename=abs_path)
+
+    symbols = []
+    kinds = {ast.ClassDef: "class", ast.FunctionDef: "def", ast.AsyncFunctionDef: "async def"}
+
+    def visit(body, prefix, depth):
+        for node in body:
+            kind = kinds.get(type(node))
+            if kind is None:
+                continue
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            name = f"{prefix}{node.name}"
+            symbols.append(_Symbol(name, kind, _signature(node), start, node.end_lineno, depth))
+            visit(node.body, f"{name}.", depth + 1)
+
+    visit(tree.body, "", 0)
+    return symbols
+
+
+def get_outline(fs, abs_path):
+    """Symbols of `abs_path`, reparsed only when its (mtime, size, inode) changes."""
+    file_fingerprint = fs.fingerprint(abs_path)
+    if file_fingerprint is None:
+        raise FileNotFoundError(abs_path)
+    with _outlines_lock:
+        cached = _outlines.get(abs_path)
+        if cached is not None and cached[0] == file_fingerprint:
+            _outlines.move_to_end(abs_path)
+            return cached[1]
+    if file_fingerprint[1] > OUTLINE_MAX_FILE_BYTES:
+        symbols = f"file is larger than {OUTLINE_MAX_FILE_BYTES} bytes"
+    else:
+        try:
+            symbols = _parse(abs_path)
+        except SyntaxError as e:
+            symbols = f"cannot parse: {e.msg} (line {e.lineno})"
+    with _outlines_lock:
+        _outlines[abs_path] = (file_fingerprint, symbols)
+        _outlines.move_to_end(abs_path)
+        while len(_outlines) > OUTLINE_CACHE_SIZE:
+            _outlines.popitem(last=False)
+    return symbols
+
+
+def prewarm_outlines(working_directory):
+    """
+    Parse the .py files under `working_directory` in a background thread, once;
+    stops after OUTLINE_CACHE_SIZE files, as more would only evict each other.
+    """
+    fs = get_sandbox(working_directory)
+    with _outlines_lock:
+        if fs.root in _prewarmed:
+            return
+        _prewarmed.add(fs.root)
+
+    def run():
+        from functions.get_files_info import iter_tree
+
+        for count, (_, entry) in enumerate(iter_tree(fs.root, include="*.py")):
+            if count >= OUTLINE_CACHE_SIZE:
+                break
+            try:
+                get_outline(fs, entry.path)
+            except (OSError, ValueError):
+                continue
+
+    threading.Thread(target=run, name="koala-outline", daemon=True).start()
+
+
+def _resolve_python_file(working_directory, file_path):
+    """(sandbox, abs path, symbols) for a Python file, or an error string."""
+    fs = get_sandbox(working_directory)
+    abs_file_path = fs.resolve(file_path)
+    if not fs.isfile(abs_file_path):
+        return f'Error: File not found or is not a regular file: "{file_path}"'
+    if not abs_file_path.endswith(".py"):
+        return f'Error: Outlines are only available for .py files. Got: "{file_path}"'
+    symbols = get_outline(fs, abs_file_path)
+    if isinstance(symbols, str):
+        return f'Error: no outline for "{file_path}": {symbols}'
+    return fs, abs_file_path, symbols
+
+
+def get_file_outline(working_directory, file_path):
+    try:
+        resolved = _resolve_python_file(working_directory, file_path)
+        if isinstance(resolved, str):
+            return resolved
+        _, _, symbols = resolved
+        if not symbols:
+            return f'[Outline of "{file_path}": no classes or functions]'
+        lines = [f'[Outline of "{file_path}": {len(symbols)} symbols; lines are inclusive]']
+        for symbol in symbols:
+            short_name = symbol.name.rsplit(".", 1)[-1]
+            lines.append(
+                f"{'  ' * symbol.depth}{symbol.kind} {short_name}{symbol.signature}"
+                f"  L{symbol.start}-{symbol.end}"
+            )
+        return "\n".join(lines)
+    except Exception as e:
+        return f'Error outlining file "{file_path}": {e}'
+
+
+def read_symbol(working_directory, file_path, symbol):
+    try:
+        resolved = _resolve_python_file(working_directory, file_path)
+        if isinstance(resolved, str):
+            return resolved
+        _, abs_file_path, symbols = resolved
+        by_name = {s.name: s for s in symbols}
+        found = by_name.get(symbol)
+        if found is None:
+            # Accept a bare method name when it is unambiguous
+            matches = [s for s in symbols if s.name.rsplit(".", 1)[-1] == symbol]
+            if len(matches) == 1:
+                found = matches[0]
+        if found is None:
+            from difflib import get_close_matches
+
+            suggestions = get_close_matches(symbol, by_name, n=5) or list(by_name)[:10]
+            return (
+                f'Error: no symbol "{symbol}" in "{file_path}". '
+                f"Did you mean: {', '.join(suggestions)}"
+            )
+
+        # readlines() splits on \n, \r and \r\n only, as ast counts lines;
+        # str.splitlines() would also split on form feeds and the like
+        with open(abs_file_path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.readlines()[found.start - 1 : found.end]
+        return (
+            f'[{found.kind} {found.name} in "{file_path}", lines {found.start}-{found.end}]\n'
+            + "".join(lines)
+        )
+    except Exception as e:
+        return f'Error reading symbol "{symbol}" from "{file_path}": {e}'
+
+
+schema_get_file_outline = {
+    "name": "get_file_outline",
+    "description": (
+        "Lists the classes and functions of a Python file with their signatures and line "
+        "ranges, without returning the code. Use it before reading large files, then fetch "
+        "just what you need with read_symbol or get_file_content start_line/end_line."
+    ),
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "file_path": {
+                "type": "STRING",
+                "description": "Path to the .py file, relative to the working directory.",
+            },
+        },
+        "required": ["file_path"],
+    },
+}
+
+schema_read_symbol = {
+    "name": "read_symbol",
+    "description": (
+        "Returns the source of one class or function from a Python file, decorators included."
+    ),
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "file_path": {
+                "type": "STRING",
+                "description": "Path to the .py file, relative to the working directory.",
+            },
+            "symbol": {
+                "type": "STRING",
+                "description": "Qualified name from get_file_outline, e.g. Calculator.evaluate.",
+            },
+        },
+        "required": ["file_path", "symbol"],
+    },
+}
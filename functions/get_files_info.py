@@ -1,38 +1,246 @@
 import os
-from google.genai import types
-from functions.safe_path import safe_path
+from fnmatch import fnmatchcase
+from config import LIST_PAGE_SIZE
+from functions.sandbox_fs import get_sandbox
 
+# Directories never worth showing to the model
+ALWAYS_SKIPPED = {".git", "__pycache__", ".venv", "venv", ".mypy_cache", ".pytest_cache"}
 
-def get_files_info(working_directory, directory="."):
+
+class _GitIgnore:
+    """The subset of .gitignore syntax that matters for listings: globs, `**`, `/`, `!`."""
+
+    def __init__(self, base_parts, patterns, prefix=()):
+        self.base_parts = base_parts
+        self.prefix = prefix  # path from this .gitignore's directory down to the listing's
+        self.rules = []
+        for pattern in patterns:
+            negate = pattern.startswith("!")
+            if negate:
+                pattern = pattern[1:]
+            dir_only = pattern.endswith("/")
+            pattern = pattern.strip("/") if dir_only else pattern
+            anchored = "/" in pattern  # a leading or inner slash anchors the rule
+            self.rules.append((pattern.lstrip("/"), negate, dir_only, anchored))
+
+    @classmethod
+    def load(cls, abs_dir, base_parts, prefix=()):
+        try:
+            with open(os.path.join(abs_dir, ".gitignore"), encoding="utf-8") as f:
+                lines = [line.strip() for line in f]
+        except (OSError, UnicodeDecodeError):
+            return None
+        patterns = [line for line in lines if line and not line.startswith("#")]
+        return cls(base_parts, patterns, prefix) if patterns else None
+
+    def ignored(self, parts, is_dir, current):
+        rel_parts = self.prefix + parts[len(self.base_parts) :]
+        rel_path = "/".join(rel_parts)
+        for pattern, negate, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                # fnmatch's `*` already crosses slashes; `**/` may also match nothing
+                matched = fnmatchcase(rel_path, pattern) or fnmatchcase(
+                    rel_path, pattern.replace("**/", "")
+                )
+            else:
+                matched = fnmatchcase(rel_parts[-1], pattern)
+            if matched:
+                current = not negate
+        return current
+
+
+def _matches_any(patterns, rel_path, name):
+    return any(fnmatchcase(rel_path, p) or fnmatchcase(name, p) for p in patterns)
+
+
+def _as_patterns(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [p.strip() for p in value.split(",") if p.strip()]
+    return list(value)
+
+
+def _ignore_chain(fs, abs_dir):
+    """The .gitignore files from the sandbox root down to `abs_dir`, outermost first."""
+    rel_path = os.path.relpath(os.path.realpath(abs_dir), fs.root)
+    below = () if rel_path == "." else tuple(rel_path.split(os.sep))
+    ignores = []
+    for depth in range(len(below) + 1):
+        ignore = _GitIgnore.load(os.path.join(fs.root, *below[:depth]), (), below[depth:])
+        if ignore:
+            ignores.append(ignore)
+    return ignores
+
+
+def _walk(fs, abs_dir, dir_parts, ignores, max_depth, include, exclude, after):
+    """
+    Yield (parts, is_dir, entry) in sorted depth-first order. That is also the
+    order of the `parts` tuples, so a cursor can prune subtrees it has passed.
+    Symlinks leading outside the sandbox `fs` are skipped altogether.
+    """
     try:
-        target_dir = safe_path(directory, working_directory)
+        with os.scandir(abs_dir) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        parts = dir_parts + (entry.name,)
+        is_dir = entry.is_dir()
+        if is_dir and entry.name in ALWAYS_SKIPPED:
+            continue
+        if entry.is_symlink() and not fs.contains(os.path.realpath(entry.path)):
+            continue
+        ignored = False
+        for ignore in ignores:
+            ignored = ignore.ignored(parts, is_dir, ignored)
+        rel_path = "/".join(parts)
+        if ignored or (exclude and _matches_any(exclude, rel_path, entry.name)):
+            continue
+
+        if after is None or parts > after:
+            if is_dir or not include or _matches_any(include, rel_path, entry.name):
+                yield parts, is_dir, entry
 
-        if not os.path.isdir(target_dir):
+        if (
+            is_dir
+            and not entry.is_symlink()
+            and (max_depth is None or len(parts) < max_depth)
+            and (after is None or parts > after or after[: len(parts)] == parts)
+        ):
+            sub_ignore = _GitIgnore.load(entry.path, parts)
+            yield from _walk(
+                fs,
+                entry.path,
+                parts,
+                ignores + [sub_ignore] if sub_ignore else ignores,
+                max_depth,
+                include,
+                exclude,
+                after,
+            )
+
+
+def iter_tree(root, include=None, exclude=None):
+    """Yield (rel_path, DirEntry) for every file below `root` that a listing would show."""
+    fs = get_sandbox(root)
+    for parts, is_dir, entry in _walk(
+        fs,
+        root,
+        (),
+        _ignore_chain(fs, root),
+        None,
+        _as_patterns(include),
+        _as_patterns(exclude),
+        None,
+    ):
+        if not is_dir:
+            yield "/".join(parts), entry
+
+
+def _format(rel_path, is_dir, size, compact):
+    if compact:
+        return f"{rel_path}/" if is_dir else f"{rel_path} {size}"
+    return f"- {rel_path}: file_size={size} bytes, is_dir={is_dir}"
+
+
+def get_files_info(
+    working_directory,
+    directory=".",
+    recursive=False,
+    max_depth=None,
+    include=None,
+    exclude=None,
+    page_size=None,
+    cursor=None,
+    compact=False,
+):
+    try:
+        fs = get_sandbox(working_directory)
+        target_dir = fs.resolve(directory)
+
+        if not fs.isdir(target_dir):
             return f'Error: "{directory}" is not a directory'
 
+        max_depth = int(max_depth) if max_depth is not None else None
+        if not recursive:
+            max_depth = 1
+        page_size = int(page_size) if page_size else LIST_PAGE_SIZE
+        after = tuple(cursor.split("/")) if cursor else None
+
         files_info = []
-        for filename in os.listdir(target_dir):
-            filepath = os.path.join(target_dir, filename)
-            is_dir = os.path.isdir(filepath)
-            size = os.path.getsize(filepath) if not is_dir else 0
-            files_info.append(
-                f"- {filename}: file_size={size} bytes, is_dir={is_dir}"
-            )
+        last = None
+        for parts, is_dir, entry in _walk(
+            fs,
+            target_dir,
+            (),
+            _ignore_chain(fs, target_dir),
+            max_depth,
+            _as_patterns(include),
+            _as_patterns(exclude),
+            after,
+        ):
+            if len(files_info) == page_size:
+                files_info.append(
+                    f'[...more entries; call again with cursor="{"/".join(last)}" to continue]'
+                )
+                break
+            # DirEntry caches its stat, so each entry costs at most one syscall
+            size = 0 if is_dir else entry.stat().st_size
+            files_info.append(_format("/".join(parts), is_dir, size, compact))
+            last = parts
         return "\n".join(files_info)
     except Exception as e:
         return f"Error listing files: {e}"
 
 
-schema_get_files_info = types.FunctionDeclaration(
-    name="get_files_info",
-    description="Lists files in the specified directory along with their sizes, constrained to the working directory.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "directory": types.Schema(
-                type=types.Type.STRING,
-                description="The directory to list files from, relative to the working directory. Defaults to current working directory.",
-            ),
-        },
+schema_get_files_info = {
+    "name": "get_files_info",
+    "description": (
+        "List files in a directory. Set recursive to walk the whole tree "
+        "(.gitignore is honored); long listings end with a cursor to continue from."
     ),
-)
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "directory": {
+                "type": "STRING",
+                "description": "The directory to list files from, relative to the working directory.",
+            },
+            "recursive": {
+                "type": "BOOLEAN",
+                "description": "List everything below the directory instead of one level.",
+            },
+            "max_depth": {
+                "type": "INTEGER",
+                "description": "With recursive, how many directory levels to descend.",
+            },
+            "include": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"},
+                "description": "Glob patterns; only matching files are listed (e.g. '*.py').",
+            },
+            "exclude": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"},
+                "description": "Glob patterns for files and directories to skip.",
+            },
+            "page_size": {
+                "type": "INTEGER",
+                "description": "Maximum number of entries to return.",
+            },
+            "cursor": {
+                "type": "STRING",
+                "description": "Cursor from a previous truncated listing.",
+            },
+            "compact": {
+                "type": "BOOLEAN",
+                "description": "One short line per entry: 'dir/' or 'path size'.",
+            },
+        },
+        "required": ["directory"],
+    },
+}
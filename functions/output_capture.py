@@ -0,0 +1,118 @@
+# functions/output_capture.py
+import os
+import selectors
+import subprocess
+import sys
+import time
+
+_READ_SIZE = 64 * 1024
+
+
+class HeadTailBuffer:
+    """
+    Keeps the first `head_size` bytes of a stream plus a fixed-size ring of the
+    last `tail_size` bytes; everything in between is only counted.
+    """
+
+    def __init__(self, head_size, tail_size):
+        self.head = bytearray()
+        self.head_size = head_size
+        self.tail = bytearray(tail_size)
+        self.tail_size = tail_size
+        self.tail_len = 0
+        self.tail_pos = 0
+        self.total = 0
+
+    def write(self, data):
+        self.total += len(data)
+        room = self.head_size - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data or not self.tail_size:
+            return
+        if len(data) >= self.tail_size:
+            self.tail[:] = data[-self.tail_size :]
+            self.tail_pos = 0
+            self.tail_len = self.tail_size
+            return
+        first = min(len(data), self.tail_size - self.tail_pos)
+        self.tail[self.tail_pos : self.tail_pos + first] = data[:first]
+        rest = len(data) - first
+        if rest:
+            self.tail[:rest] = data[first:]
+        self.tail_pos = (self.tail_pos + len(data)) % self.tail_size
+        self.tail_len = min(self.tail_size, self.tail_len + len(data))
+
+    @property
+    def dropped(self):
+        return self.total - len(self.head) - self.tail_len
+
+    def getvalue(self):
+        if self.tail_len < self.tail_size:
+            tail = bytes(self.tail[: self.tail_len])
+        else:
+            tail = bytes(self.tail[self.tail_pos :] + self.tail[: self.tail_pos])
+        if self.dropped:
+            marker = f"\n[... {self.dropped} bytes omitted ...]\n".encode("utf-8")
+            return bytes(self.head) + marker + tail
+        return bytes(self.head) + tail
+
+
+def capture(process, timeout, head_size, tail_size, live_tail=False):
+    """
+    Drain a Popen's stdout/stderr pipes without blocking, keeping memory flat.
+    Returns a CompletedProcess with text output plus `stdout_dropped` and
+    `stderr_dropped` byte counts; raises TimeoutExpired (after killing the
+    process) like subprocess.run does.
+    """
+    deadline = time.monotonic() + timeout
+    buffers = {}
+    consoles = {}
+    selector = selectors.DefaultSelector()
+    for name, pipe, console in (
+        ("stdout", process.stdout, sys.stdout),
+        ("stderr", process.stderr, sys.stderr),
+    ):
+        os.set_blocking(pipe.fileno(), False)
+        selector.register(pipe, selectors.EVENT_READ, name)
+        buffers[name] = HeadTailBuffer(head_size, tail_size)
+        consoles[name] = console
+
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                process.kill()
+                process.wait()
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            for key, _ in selector.select(remaining):
+                data = os.read(key.fd, _READ_SIZE)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                    continue
+                buffers[key.data].write(data)
+                if live_tail:
+                    console = consoles[key.data]
+                    console.write(data.decode("utf-8", errors="replace"))
+                    console.flush()
+    finally:
+        selector.close()
+
+    try:
+        process.wait(max(0.0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise subprocess.TimeoutExpired(process.args, timeout)
+
+    result = subprocess.CompletedProcess(
+        process.args,
+        process.returncode,
+        buffers["stdout"].getvalue().decode("utf-8", errors="replace"),
+        buffers["stderr"].getvalue().decode("utf-8", errors="replace"),
+    )
+    result.stdout_dropped = buffers["stdout"].dropped
+    result.stderr_dropped = buffers["stderr"].dropped
+    return result
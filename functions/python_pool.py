@@ -0,0 +1,151 @@
+# functions/python_pool.py
+import atexit
+import json
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+
+from config import PYTHON_POOL_PREIMPORTS, RUN_PYTHON_MAX_MEMORY_MB
+from functions.output_capture import capture
+
+# Runs inside each worker: finish interpreter start-up and the pre-imports, then
+# block until one job arrives, cap memory, and run the script as __main__.
+_BOOTSTRAP = r"""
+import atexit, json, os, runpy, sys, traceback
+for _name in {preimports!r}:
+    try:
+        __import__(_name)
+    except ImportError:
+        pass
+_job = json.loads(sys.stdin.readline() or "null")
+if _job is None:
+    os._exit(0)
+sys.stdin.close()
+sys.stdin = open(os.devnull)
+try:
+    import resource
+    _limit = {max_memory_mb} * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (_limit, _limit))
+except (ImportError, ValueError, OSError):
+    pass
+sys.argv = [_job["path"]] + _job["args"]
+if sys.path and sys.path[0] == "":
+    sys.path[0] = os.path.dirname(_job["path"])
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+    _code = 0
+except SystemExit as _exc:
+    _code = _exc.code
+    if _code is None:
+        _code = 0
+    elif not isinstance(_code, int):
+        print(_code, file=sys.stderr)
+        _code = 1
+except BaseException as _exc:
+    # Drop the bootstrap and runpy frames so the traceback reads like `python script.py`
+    _tb = _exc.__traceback__
+    while _tb is not None and _tb.tb_frame.f_code.co_filename in ("<string>", "<frozen runpy>"):
+        _tb = _tb.tb_next
+    traceback.print_exception(type(_exc), _exc, _tb)
+    _code = 1
+# Run the script's exit hooks, then skip interpreter finalization: the worker is
+# thrown away anyway and tearing down every module costs more than the run itself.
+if "threading" in sys.modules:
+    sys.modules["threading"]._shutdown()
+atexit._run_exitfuncs()
+sys.stdout.flush()
+sys.stderr.flush()
+os._exit(_code & 0xFF)
+"""
+
+
+class PythonWorkerPool:
+    """
+    Keeps `size` pre-started, idle interpreters for one working directory.
+    Each worker runs exactly one script and exits, so every run starts from a
+    clean interpreter; the pool refills itself in the background.
+    """
+
+    def __init__(self, size, cwd):
+        self.size = size
+        self.cwd = cwd
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._bootstrap = _BOOTSTRAP.format(
+            preimports=tuple(PYTHON_POOL_PREIMPORTS),
+            max_memory_mb=RUN_PYTHON_MAX_MEMORY_MB,
+        )
+        self._refill()
+
+    def _spawn(self):
+        return subprocess.Popen(
+            [sys.executable, "-c", self._bootstrap],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd,
+        )
+
+    def _refill(self):
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in range(missing):
+            worker = self._spawn()
+            with self._lock:
+                self._idle.append(worker)
+
+    def acquire(self):
+        """Take a live idle worker (or start one) and top the pool back up."""
+        worker = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.poll() is None:
+                    worker = candidate
+                    break
+        if worker is None:
+            worker = self._spawn()
+        threading.Thread(target=self._refill, daemon=True).start()
+        return worker
+
+    def run(self, abs_file_path, args, timeout, **capture_options):
+        """
+        Run a script in a warm worker. Like the cold path, returns the
+        CompletedProcess from output_capture.capture or raises TimeoutExpired.
+        """
+        worker = self.acquire()
+        job = json.dumps({"path": abs_file_path, "args": list(args or [])})
+        try:
+            worker.stdin.write((job + "\n").encode("utf-8"))
+            worker.stdin.close()
+        except BrokenPipeError:
+            pass
+        return capture(worker, timeout, **capture_options)
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for worker in idle:
+            worker.kill()
+            worker.communicate()  # reaps it and closes its pipes
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(size, cwd):
+    cwd = os.path.abspath(cwd)
+    with _pools_lock:
+        pool = _pools.get(cwd)
+        if pool is None:
+            pool = _pools[cwd] = PythonWorkerPool(size, cwd)
+    return pool
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in list(_pools.values()):
+        pool.shutdown()
@@ -0,0 +1,141 @@
+# functions/registry.py
+import importlib
+from functools import lru_cache
+
+
+class ToolEntry:
+    """
+    One tool the model can call, and how call_function dispatches it. The
+    module holding its function and plain-dict schema is imported the first
+    time either is needed.
+
+    read_only   may run concurrently with other read-only calls
+    cache_arg   argument naming the file whose results tool_cache may reuse
+                while the file's (mtime, size, inode) is unchanged
+    unsafe      (blocked label, warning) for tools refused in safe mode
+    invalidates "path" drops cached results for the target, "all" clears the cache
+    """
+
+    def __init__(
+        self,
+        name,
+        module,
+        function,
+        schema,
+        read_only=False,
+        cache_arg=None,
+        unsafe=None,
+        invalidates=None,
+    ):
+        self.name = name
+        self.module = module
+        self.function_name = function
+        self.schema_name = schema
+        self.read_only = read_only
+        self.cache_arg = cache_arg
+        self.unsafe = unsafe
+        self.invalidates = invalidates
+
+    @property
+    def function(self):
+        return getattr(importlib.import_module(self.module), self.function_name)
+
+    @property
+    def schema(self):
+        return getattr(importlib.import_module(self.module), self.schema_name)
+
+
+TOOLS = {
+    entry.name: entry
+    for entry in (
+        ToolEntry(
+            "get_files_info",
+            "functions.get_files_info",
+            "get_files_info",
+            "schema_get_files_info",
+            read_only=True,
+            # Not cached: a directory's fingerprint misses rewritten files and
+            # anything changed in its subdirectories
+        ),
+        ToolEntry(
+            "get_file_content",
+            "functions.get_file_content",
+            "get_file_content",
+            "schema_get_file_content",
+            read_only=True,
+            cache_arg="file_path",
+        ),
+        ToolEntry(
+            "get_file_outline",
+            "functions.get_file_outline",
+            "get_file_outline",
+            "schema_get_file_outline",
+            read_only=True,
+            cache_arg="file_path",
+        ),
+        ToolEntry(
+            "read_symbol",
+            "functions.get_file_outline",
+            "read_symbol",
+            "schema_read_symbol",
+            read_only=True,
+            cache_arg="file_path",
+        ),
+        ToolEntry(
+            "search_code",
+            "functions.search_code",
+            "search_code",
+            "schema_search_code",
+            read_only=True,
+        ),
+        ToolEntry(
+            "write_file",
+            "functions.write_file_content",
+            "write_file",
+            "schema_write_file",
+            unsafe=("Write", "writing to a file"),
+            invalidates="path",
+        ),
+        ToolEntry(
+            "apply_edit",
+            "functions.apply_edit",
+            "apply_edit",
+            "schema_apply_edit",
+            unsafe=("Edit", "editing a file"),
+            invalidates="path",
+        ),
+        ToolEntry(
+            "run_python_file",
+            "functions.run_python",
+            "run_python_file",
+            "schema_run_python_file",
+            unsafe=("Execution", "executing Python code"),
+            # A script can touch anything in the sandbox
+            invalidates="all",
+        ),
+    )
+}
+
+# Names older tool declarations used; still accepted when dispatching
+ALIASES = {
+    "write_file_content": "write_file",
+    "run_python": "run_python_file",
+}
+
+
+def get_tool(name):
+    """The ToolEntry for `name` (or one of its old aliases), or None."""
+    return TOOLS.get(ALIASES.get(name, name))
+
+
+@lru_cache(maxsize=1)
+def tool_declarations():
+    """Build the genai Tool declaring every registered function (once, on first use)."""
+    from google.genai import types
+
+    return types.Tool(
+        function_declarations=[
+            types.FunctionDeclaration.model_validate(entry.schema)
+            for entry in TOOLS.values()
+        ]
+    )
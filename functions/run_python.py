@@ -1,15 +1,40 @@
 import os
 import subprocess
-from google.genai import types
-from functions.safe_path import safe_path  # 👈 new helper file
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+from functions.safe_path import PROJECT_ROOT
+from functions.sandbox_fs import get_sandbox
+from functions.python_pool import get_pool
+from functions.output_capture import capture
+from config import RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES, RUN_PYTHON_MAX_MEMORY_MB
 
 # Opt-in env flag
 ALLOW_EXEC = os.getenv("ALLOW_EXEC", "false").lower() == "true"
+# Number of pre-started interpreters to keep warm (0 = cold subprocess per run)
+PYTHON_WORKER_POOL = int(os.getenv("PYTHON_WORKER_POOL", "0"))
+# Echo the script's output to the console while it runs
+LIVE_TAIL = os.getenv("LIVE_TAIL", "false").lower() == "true"
 
-def run_python_file(file_path: str, args=None, dry_run: bool = False):
+
+def _limit_memory():
+    # Runs in the child between fork and exec, the same cap pool workers set
+    limit = RUN_PYTHON_MAX_MEMORY_MB * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def run_python_file(
+    working_directory=None, file_path: str = None, args=None, dry_run: bool = False
+):
     try:
         # Ensure safe path
-        abs_file_path = safe_path(file_path)
+        fs = get_sandbox(working_directory or PROJECT_ROOT)
+        abs_file_path = fs.resolve(file_path)
+        cwd = fs.root
 
         # Only allow .py files
         if not abs_file_path.endswith(".py"):
@@ -28,14 +53,31 @@ def run_python_file(file_path: str, args=None, dry_run: bool = False):
         if dry_run:
             return f"[DryRun] Would run: {' '.join(commands)}"
 
-        # Run safely
-        result = subprocess.run(
-            commands,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.getcwd(),  # sandboxed root
-        )
+        # Run safely, in a warm worker when the pool is enabled. Output is
+        # streamed into bounded head/tail buffers, however much the script prints.
+        capture_options = {
+            "head_size": RUN_OUTPUT_HEAD_BYTES,
+            "tail_size": RUN_OUTPUT_TAIL_BYTES,
+            "live_tail": LIVE_TAIL,
+        }
+        try:
+            if PYTHON_WORKER_POOL > 0:
+                result = get_pool(PYTHON_WORKER_POOL, cwd).run(
+                    abs_file_path, args, timeout=30, **capture_options
+                )
+            else:
+                process = subprocess.Popen(
+                    commands,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=cwd,  # sandboxed root
+                    preexec_fn=_limit_memory if resource else None,
+                )
+                result = capture(process, timeout=30, **capture_options)
+        finally:
+            # The script may have changed anything under the sandbox
+            fs.invalidate()
 
         output = []
         if result.stdout:
@@ -44,31 +86,42 @@ def run_python_file(file_path: str, args=None, dry_run: bool = False):
             output.append(f"STDERR:\n{result.stderr}")
         if result.returncode != 0:
             output.append(f"Process exited with code {result.returncode}")
+            # Allocations past the cap fail with MemoryError, or kill the
+            # process outright when they happen in C code
+            if resource and (result.returncode < 0 or "MemoryError" in result.stderr):
+                output.append(
+                    f"Note: scripts run with a {RUN_PYTHON_MAX_MEMORY_MB} MiB address-space limit"
+                )
+        if result.stdout_dropped or result.stderr_dropped:
+            output.append(
+                f"Output truncated: {result.stdout_dropped} bytes of stdout and "
+                f"{result.stderr_dropped} bytes of stderr omitted"
+            )
 
         return "\n".join(output) if output else "No output produced."
     except Exception as e:
         return f"Error: executing Python file: {e}"
 
 
-schema_run_python_file = types.FunctionDeclaration(
-    name="run_python_file",
-    description="Executes a Python file within the working directory and returns the output from the interpreter.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="Path to the Python file to execute, relative to the working directory.",
-            ),
-            "args": types.Schema(
-                type=types.Type.ARRAY,
-                items=types.Schema(
-                    type=types.Type.STRING,
-                    description="Optional arguments to pass to the Python file.",
-                ),
-                description="Optional arguments to pass to the Python file.",
-            ),
-        },
-        required=["file_path"],
+schema_run_python_file = {
+    "name": "run_python_file",
+    "description": (
+        "Executes a Python file within the working directory and returns the output "
+        "from the interpreter. Only available in unsafe mode."
     ),
-)
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "file_path": {
+                "type": "STRING",
+                "description": "Path to the Python file to execute, relative to the working directory.",
+            },
+            "args": {
+                "type": "ARRAY",
+                "items": {"type": "STRING"},
+                "description": "Optional arguments to pass to the Python file.",
+            },
+        },
+        "required": ["file_path"],
+    },
+}
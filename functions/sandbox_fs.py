@@ -0,0 +1,103 @@
+# functions/sandbox_fs.py
+import os
+import stat
+import threading
+
+from config import SANDBOX_MEMO_SIZE
+
+
+class SandboxFS:
+    """
+    The tools' view of one working directory. Paths are resolved with
+    realpath and must land inside the (real) root, so a symlink cannot lead
+    out of the sandbox. Resolutions and stat results are memoized and tagged
+    with a generation counter; invalidate() starts a new generation and is
+    called after every write or script run and at the start of every model
+    turn, so files edited outside the agent are noticed on the next turn.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self.generation = 0
+        self._resolved = {}  # relative path -> (generation, absolute real path)
+        self._stats = {}  # absolute path -> (generation, stat_result or None)
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._resolved = {}
+            self._stats = {}
+
+    def _remember(self, memo, key, value):
+        if len(memo) >= SANDBOX_MEMO_SIZE:
+            memo.clear()
+        memo[key] = value
+
+    def contains(self, real_path):
+        """True when an already realpath'ed `real_path` is the root or below it."""
+        return real_path == self.root or real_path.startswith(self.root + os.sep)
+
+    def resolve(self, path):
+        """Absolute real path of `path` (relative to the root); ValueError if it escapes."""
+        if os.path.isabs(path):
+            raise ValueError(f"Absolute paths are forbidden: {path}")
+        # Read the generation first: an entry made while invalidate() runs is born stale
+        generation = self.generation
+        memo = self._resolved
+        cached = memo.get(path)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        candidate = os.path.realpath(os.path.join(self.root, path))
+        if not self.contains(candidate):
+            raise ValueError(f"Access to '{path}' is outside the permitted sandbox.")
+        self._remember(memo, path, (generation, candidate))
+        return candidate
+
+    def stat(self, abs_path):
+        """Memoized os.stat of an already resolved path, or None if it does not exist."""
+        generation = self.generation
+        memo = self._stats
+        cached = memo.get(abs_path)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            st = None
+        self._remember(memo, abs_path, (generation, st))
+        return st
+
+    def isfile(self, abs_path):
+        st = self.stat(abs_path)
+        return st is not None and stat.S_ISREG(st.st_mode)
+
+    def isdir(self, abs_path):
+        st = self.stat(abs_path)
+        return st is not None and stat.S_ISDIR(st.st_mode)
+
+    def getsize(self, abs_path):
+        st = self.stat(abs_path)
+        if st is None:
+            raise FileNotFoundError(abs_path)
+        return st.st_size
+
+    def fingerprint(self, abs_path):
+        """(mtime, size, inode) like tool_cache.fingerprint, from the memoized stat."""
+        st = self.stat(abs_path)
+        return None if st is None else (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+_sandboxes = {}
+_sandboxes_lock = threading.Lock()
+
+
+def get_sandbox(working_directory):
+    """The SandboxFS shared by every tool call against `working_directory`."""
+    key = os.path.abspath(working_directory)
+    sandbox = _sandboxes.get(key)
+    if sandbox is None:
+        with _sandboxes_lock:
+            sandbox = _sandboxes.setdefault(key, SandboxFS(key))
+    return sandbox
@@ -0,0 +1,290 @@
+import hashlib
+import marshal
+import os
+import re
+import threading
+import time
+from config import (
+    SEARCH_INDEX_DIR,
+    SEARCH_MAX_FILE_BYTES,
+    SEARCH_REFRESH_INTERVAL,
+)
+from functions.get_files_info import iter_tree
+from functions.safe_path import PROJECT_ROOT
+from functions.sandbox_fs import get_sandbox
+
+# Bump when the on-disk layout or what gets indexed changes so stale indexes are rebuilt
+INDEX_VERSION = 3
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _read_text(abs_path, size):
+    if size > SEARCH_MAX_FILE_BYTES:
+        return None
+    try:
+        with open(abs_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+class TrigramIndex:
+    """
+    Lower-cased trigram -> file-id postings for every text file under `root`.
+    Refreshes compare each file's (mtime, size) with what was indexed, so only
+    new or changed files are re-read. Changed files get a fresh id; ids of
+    replaced or deleted files are dropped from postings when dead ones pile up.
+    """
+
+    def __init__(self, root, index_path):
+        self.root = root
+        self.index_path = index_path
+        self.files = {}  # rel path -> (mtime_ns, size, file id)
+        self.paths = {}  # live file id -> rel path
+        self.postings = {}  # trigram -> set of file ids
+        self.next_id = 0
+        self.dead = 0
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root, index_path):
+        index = cls(root, index_path)
+        try:
+            # marshal, unlike pickle, only rebuilds plain data: a file planted
+            # in the cache directory by a script cannot run code here
+            with open(index_path, "rb") as f:
+                version, state = marshal.load(f)
+            if version == INDEX_VERSION and state["root"] == root:
+                index.files = state["files"]
+                index.postings = state["postings"]
+                index.next_id = state["next_id"]
+                index.paths = {
+                    fid: path
+                    for path, (_, _, fid) in index.files.items()
+                    if fid is not None
+                }
+        except (OSError, EOFError, KeyError, TypeError, ValueError):
+            pass
+        return index
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        state = {
+            "root": self.root,
+            "files": self.files,
+            "postings": self.postings,
+            "next_id": self.next_id,
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump((INDEX_VERSION, state), f)
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self, force=False):
+        """Bring the index up to date with the tree; returns the number of files re-read."""
+        if not force and time.monotonic() - self.refreshed_at < SEARCH_REFRESH_INTERVAL:
+            return 0
+
+        seen = set()
+        changed = 0
+        # iter_tree skips symlinks that lead outside the sandbox rooted here
+        for rel_path, entry in iter_tree(self.root):
+            seen.add(rel_path)
+            st = entry.stat()
+            known = self.files.get(rel_path)
+            if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+                continue
+            if known:
+                self._drop(rel_path)
+            changed += 1
+            text = _read_text(entry.path, st.st_size)
+            if text is None:
+                # Remember binary and oversized files so they are not re-read
+                self.files[rel_path] = (st.st_mtime_ns, st.st_size, None)
+                continue
+            file_id = self.next_id
+            self.next_id += 1
+            self.files[rel_path] = (st.st_mtime_ns, st.st_size, file_id)
+            self.paths[file_id] = rel_path
+            for trigram in _trigrams(text.lower()):
+                self.postings.setdefault(trigram, set()).add(file_id)
+
+        for rel_path in [p for p in self.files if p not in seen]:
+            self._drop(rel_path)
+            changed += 1
+
+        if self.dead > len(self.paths):
+            self._compact()
+        if changed:
+            self.save()
+        self.refreshed_at = time.monotonic()
+        return changed
+
+    def candidates(self, needle):
+        """Live rel paths that contain every trigram of the lower-cased needle."""
+        grams = sorted(_trigrams(needle.lower()), key=lambda g: len(self.postings.get(g, ())))
+        if not grams:
+            return sorted(self.paths.values())
+        ids = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not ids:
+                break
+            ids &= self.postings.get(gram, set())
+        return sorted(self.paths[i] for i in ids if i in self.paths)
+
+    def _drop(self, rel_path):
+        _, _, file_id = self.files.pop(rel_path)
+        if self.paths.pop(file_id, None) is not None:
+            self.dead += 1
+
+    def _compact(self):
+        for trigram in list(self.postings):
+            live = {i for i in self.postings[trigram] if i in self.paths}
+            if live:
+                self.postings[trigram] = live
+            else:
+                del self.postings[trigram]
+        self.dead = 0
+
+
+def get_index(working_directory):
+    root = os.path.abspath(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+            index_path = os.path.join(PROJECT_ROOT, SEARCH_INDEX_DIR, f"search-{digest}.idx")
+            index = TrigramIndex.load(root, index_path)
+            _indexes[root] = index
+    return index
+
+
+def mark_stale(working_directory):
+    """Force the next search under `working_directory` to re-check file mtimes."""
+    index = _indexes.get(os.path.abspath(working_directory))
+    if index is not None:
+        index.refreshed_at = 0.0
+
+
+def _make_scorer(query):
+    definition = re.compile(rf"\s*(async\s+def|def|class)\s+{re.escape(query)}\b")
+    assignment = re.compile(rf"\s*{re.escape(query)}\s*=")
+
+    def score(line, rel_path):
+        points = 1
+        if definition.match(line):
+            points += 10
+        elif assignment.match(line):
+            points += 5
+        if query in line:
+            points += 2
+        if query.lower() in rel_path.lower():
+            points += 3
+        return points
+
+    return score
+
+
+def search_code(
+    working_directory,
+    query,
+    directory=".",
+    case_sensitive=False,
+    max_results=20,
+    context_lines=2,
+):
+    try:
+        if not query or len(query) > 200:
+            return "Error: query must be between 1 and 200 characters"
+        fs = get_sandbox(working_directory)
+        scope = fs.resolve(directory)
+        scope_prefix = os.path.relpath(scope, fs.root)
+        scope_prefix = "" if scope_prefix == "." else scope_prefix.replace(os.sep, "/") + "/"
+        max_results = int(max_results)
+        context_lines = int(context_lines)
+
+        index = get_index(working_directory)
+        with index.lock:
+            index.refresh()
+            candidates = [p for p in index.candidates(query) if p.startswith(scope_prefix)]
+
+        needle = query if case_sensitive else query.lower()
+        score = _make_scorer(query)
+        hits = []
+        for rel_path in candidates:
+            try:
+                # The link may have been repointed since the file was indexed
+                abs_path = fs.resolve(rel_path)
+            except ValueError:
+                continue
+            text = _read_text(abs_path, os.path.getsize(abs_path))
+            if text is None:
+                continue
+            lines = text.splitlines()
+            for number, line in enumerate(lines, start=1):
+                haystack = line if case_sensitive else line.lower()
+                if needle in haystack:
+                    hits.append((-score(line, rel_path), rel_path, number, lines))
+
+        if not hits:
+            return f'No matches for "{query}"'
+
+        hits.sort(key=lambda hit: hit[:3])
+        output = [f'{len(hits)} matches for "{query}" in {len({h[1] for h in hits})} files']
+        for _, rel_path, number, lines in hits[:max_results]:
+            output.append(f"{rel_path}:{number}")
+            first = max(1, number - context_lines)
+            last = min(len(lines), number + context_lines)
+            for n in range(first, last + 1):
+                marker = ">" if n == number else " "
+                output.append(f"{marker}{n:>6} | {lines[n - 1]}")
+        if len(hits) > max_results:
+            output.append(f"[...{len(hits) - max_results} more matches not shown]")
+        return "\n".join(output)
+    except Exception as e:
+        return f"Error searching code: {e}"
+
+
+schema_search_code = {
+    "name": "search_code",
+    "description": (
+        "Search text files for a literal string (e.g. a symbol name) and get "
+        "ranked file:line hits with context. Faster than listing and reading files."
+    ),
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "query": {
+                "type": "STRING",
+                "description": "Literal text to search for.",
+            },
+            "directory": {
+                "type": "STRING",
+                "description": "Only search below this directory, relative to the working directory.",
+            },
+            "case_sensitive": {
+                "type": "BOOLEAN",
+                "description": "Match case exactly (default false).",
+            },
+            "max_results": {
+                "type": "INTEGER",
+                "description": "Maximum number of hits to return.",
+            },
+            "context_lines": {
+                "type": "INTEGER",
+                "description": "Lines of context around each hit.",
+            },
+        },
+        "required": ["query"],
+    },
+}
@@ -0,0 +1,106 @@
+# functions/tool_cache.py
+import os
+import threading
+from collections import OrderedDict
+
+from config import TOOL_CACHE_SIZE
+
+
+def fingerprint(abs_path):
+    """(mtime, size, inode) of `abs_path`, or None when it cannot be stat'ed."""
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ToolCache:
+    """
+    Bounded LRU of read-only tool results.
+    Keys carry the target's fingerprint, so a file changed behind our back
+    simply misses; writes made through the tools evict their entries eagerly.
+    """
+
+    def __init__(self, maxsize=TOOL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> result
+        self._paths = {}  # abs path -> set of keys
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(function_name, abs_path, args, file_fingerprint=None):
+        normalized = tuple(
+            sorted(
+                (name, repr(value))
+                for name, value in args.items()
+                if name not in ("working_directory", "directory", "file_path")
+            )
+        )
+        if file_fingerprint is None:
+            file_fingerprint = fingerprint(abs_path)
+        return (function_name, abs_path, normalized, file_fingerprint)
+
+    def get_or_call(self, function_name, abs_path, args, func, file_fingerprint=None):
+        """
+        Return the cached result for this call, running `func()` on a miss.
+        `file_fingerprint` saves the stat when the caller already has one.
+        """
+        key = self.make_key(function_name, abs_path, args, file_fingerprint)
+        if key[-1] is None:
+            return func(), False
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+            self.misses += 1
+
+        result = func()
+        if isinstance(result, str) and result.startswith("Error"):
+            return result, False
+
+        with self._lock:
+            self._entries[key] = result
+            self._paths.setdefault(abs_path, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.evictions += 1
+        return result, False
+
+    def invalidate(self, abs_path):
+        """Evict entries for `abs_path` and for listings of any directory above it."""
+        abs_path = os.path.abspath(abs_path)
+        with self._lock:
+            for path in list(self._paths):
+                if path == abs_path or abs_path.startswith(path.rstrip(os.sep) + os.sep):
+                    for key in self._paths.pop(path):
+                        self._entries.pop(key, None)
+                        self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+            self._paths.clear()
+
+    def stats(self):
+        return (
+            f"Tool cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.evictions} evictions, {len(self._entries)} entries"
+        )
+
+    def _forget(self, key):
+        keys = self._paths.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._paths[key[1]]
+
+
+tool_cache = ToolCache()
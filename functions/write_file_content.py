@@ -1,14 +1,13 @@
 import os
-from google.genai import types
-from functions.safe_path import safe_path  # 👈 create this helper file once
+from functions.sandbox_fs import get_sandbox
 
 # Writes disabled by default
 ALLOW_WRITES = os.getenv("ALLOW_WRITES", "false").lower() == "true"
 
 def write_file(working_directory, file_path, content, dry_run: bool = False):
     try:
-        abs_working_dir = os.path.abspath(working_directory)
-        abs_file_path = safe_path(file_path, abs_working_dir)  # 👈 enforce sandbox
+        fs = get_sandbox(working_directory)
+        abs_file_path = fs.resolve(file_path)  # 👈 enforce sandbox
 
         # Writes disabled unless explicitly enabled
         if not ALLOW_WRITES:
@@ -24,14 +23,16 @@ def write_file(working_directory, file_path, content, dry_run: bool = False):
                 f"---\n{content}\n---"
             )
 
-        # Ensure parent directories exist
-        os.makedirs(os.path.dirname(abs_file_path), exist_ok=True)
-
-        if os.path.exists(abs_file_path) and os.path.isdir(abs_file_path):
+        if fs.isdir(abs_file_path):
             return f'Error: "{file_path}" is a directory, not a file'
 
-        with open(abs_file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        # Ensure parent directories exist
+        try:
+            os.makedirs(os.path.dirname(abs_file_path), exist_ok=True)
+            with open(abs_file_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        finally:
+            fs.invalidate()
 
         return f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
 
@@ -39,21 +40,24 @@ def write_file(working_directory, file_path, content, dry_run: bool = False):
         return f"Error: writing to file: {e}"
 
 
-schema_write_file = types.FunctionDeclaration(
-    name="write_file",
-    description="Writes content to a file within the working directory. Creates the file if it doesn't exist.",
-    parameters=types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "file_path": types.Schema(
-                type=types.Type.STRING,
-                description="Path to the file to write, relative to the working directory.",
-            ),
-            "content": types.Schema(
-                type=types.Type.STRING,
-                description="Content to write to the file",
-            ),
-        },
-        required=["file_path", "content"],
+schema_write_file = {
+    "name": "write_file",
+    "description": (
+        "Writes content to a file within the working directory, creating it if it "
+        "doesn't exist. Only available in unsafe mode."
     ),
-)
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "file_path": {
+                "type": "STRING",
+                "description": "Path to the file to write, relative to the working directory.",
+            },
+            "content": {
+                "type": "STRING",
+                "description": "Content to write to the file.",
+            },
+        },
+        "required": ["file_path", "content"],
+    },
+}
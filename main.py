@@ -1,86 +1,242 @@
 import os
-from dotenv import load_dotenv
-from google import genai
-from google.genai import  types
-
-# ✅ import from root-level call_function.py
-from call_function import call_function, available_functions
-
+import time
+
+# google.genai is imported on first use: it takes most of a second to load
+from agent import MODEL, SYSTEM_INSTRUCTION, handle_response, handle_stream, request_config
+from cassette import RecordingClient, ReplayClient
+from config import (
+    BATCH_CONCURRENCY,
+    BATCH_REQUESTS_PER_MINUTE,
+    BATCH_TOKENS_PER_MINUTE,
+    MAX_ITERS,
+    WORKING_DIR,
+)
+from functions.get_file_outline import prewarm_outlines
+from functions.tool_cache import tool_cache
+from metrics import tool_metrics
+from model_client import get_client, model_stats
+from tracing import open_tracer
+from message_history import MessageHistory
+from context_cache import get_cached_context
+from session_store import SessionStore
+
+
+def generate_content(
+    client,
+    history,
+    verbose,
+    dry_run,
+    system_instruction,
+    span=None,
+    cached_content=None,
+    stream=False,
+):
+    saved = history.compact()
+    if verbose and saved:
+        print(f"History compacted: ~{saved} tokens saved")
+    if span is not None:
+        span.compacted_tokens = saved
+
+    model_start = time.perf_counter()
+    if stream:
+        chunks = client.models.generate_content_stream(
+            model=MODEL,
+            contents=history.messages,
+            config=request_config(system_instruction, cached_content),
+        )
+        return handle_stream(chunks, history, verbose, dry_run, span, model_start=model_start)
 
-def generate_content(client, messages, verbose, dry_run, system_instruction):
     response = client.models.generate_content(
-        model="gemini-2.0-flash-001",
-        contents=messages,
-        config=types.GenerateContentConfig(
-            tools=[available_functions],
-            system_instruction=system_instruction,
-        ),
+        model=MODEL,
+        contents=history.messages,
+        config=request_config(system_instruction, cached_content),
     )
 
-    if verbose:
-        print("Prompt tokens:", response.usage_metadata.prompt_token_count)
-        print("Response tokens:", response.usage_metadata.candidates_token_count)
-
-    if response.candidates:
-        for candidate in response.candidates:
-            function_call_content = candidate.content
-            messages.append(function_call_content)
-
-    if not response.function_calls:
-        mode_tag = "[SAFE MODE]" if dry_run else "[UNSAFE MODE]"
-        return f"{mode_tag}\n\n{response.text}"
-
-    function_responses = []
-    for function_call_part in response.function_calls:
-        function_call_result = call_function(
-            function_call_part, verbose=verbose, dry_run=dry_run
-        )
-        if (
-            not function_call_result.parts
-            or not function_call_result.parts[0].function_response
-        ):
-            raise Exception("empty function call result")
-        if verbose:
-            print(f"-> {function_call_result.parts[0].function_response.response}")
-        function_responses.append(function_call_result.parts[0])
+    if span is not None:
+        span.model_done(time.perf_counter() - model_start, response.usage_metadata)
 
-    if not function_responses:
-        raise Exception("no function responses generated, exiting.")
+    return handle_response(response, history, verbose, dry_run, span)
 
-    messages.append(types.Content(role="user", parts=function_responses))
 
+def _replay_latency(value):
+    return value if value == "recorded" else float(value)
 
-def main():
-    load_dotenv()
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("❌ GEMINI_API_KEY not set in environment")
 
-    client = genai.Client(api_key=api_key)
+def run_batch_file(client, args, dry_run):
+    import asyncio
+    from batch import read_jobs, run_batch
+
+    output_path = args.batch_output or args.batch.removesuffix(".jsonl") + ".results.jsonl"
+    jobs = read_jobs(args.batch)
+    start = time.perf_counter()
+    succeeded, failed = asyncio.run(
+        run_batch(
+            client,
+            jobs,
+            output_path,
+            args.concurrency,
+            args.rpm,
+            args.tpm,
+            dry_run,
+            SYSTEM_INSTRUCTION,
+        )
+    )
+    print(
+        f"Batch finished in {time.perf_counter() - start:.1f}s: {succeeded} succeeded, "
+        f"{failed} failed; results in {output_path}"
+    )
+    if args.stats:
+        print(tool_metrics.summary())
+        print(model_stats.summary())
+
 
+def main():
     import argparse
 
     parser = argparse.ArgumentParser()
     parser.add_argument("prompt", type=str, nargs="*", help="Prompt to send to Killer Koala")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     parser.add_argument("--unsafe", action="store_true", help="Enable unsafe mode (allow writes/exec)")
+    parser.add_argument("--stream", action="store_true", help="Print the answer as it is generated and run tool calls as soon as they arrive")
+    parser.add_argument("--stats", action="store_true", help="Print per-tool latency and payload stats at exit")
+    parser.add_argument("--trace", metavar="PATH", help="Append one JSON span per model turn to PATH")
+    parser.add_argument("--record", metavar="PATH", help="Record model requests/responses to a cassette file")
+    parser.add_argument("--replay", metavar="PATH", help="Replay model responses from a cassette instead of calling the API")
+    parser.add_argument(
+        "--replay-latency",
+        metavar="SECONDS",
+        type=_replay_latency,
+        help='Delay per replayed response, or "recorded" to reuse the recorded latency',
+    )
+    parser.add_argument("--session", metavar="NAME", help="Continue (and save) a named conversation")
+    parser.add_argument(
+        "--cache-context",
+        action="store_true",
+        help="Keep the system prompt, tool declarations and pinned files in a model-side context cache",
+    )
+    parser.add_argument("--pin", metavar="FILE", action="append", default=[], help="With --cache-context, add FILE to the cached prefix (repeatable)")
+    parser.add_argument("--base-url", metavar="URL", help="Send API requests to URL (e.g. a local fake_gemini.py)")
+    parser.add_argument("--batch", metavar="PATH", help="Run every prompt in a JSONL file concurrently")
+    parser.add_argument("--batch-output", metavar="PATH", help="Where --batch appends results (default: <batch>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Sessions in flight in --batch mode")
+    parser.add_argument("--rpm", type=int, default=BATCH_REQUESTS_PER_MINUTE, help="Model requests per minute in --batch mode (0 = no limit)")
+    parser.add_argument("--tpm", type=int, default=BATCH_TOKENS_PER_MINUTE, help="Tokens per minute in --batch mode (0 = no limit)")
     args = parser.parse_args()
+    if args.batch and (args.replay or args.record or args.trace or args.session or args.cache_context):
+        parser.error("--batch cannot be combined with --record/--replay/--trace/--session/--cache-context")
+    if args.pin and not args.cache_context:
+        parser.error("--pin requires --cache-context")
+    if args.stream and (args.batch or args.record or args.replay):
+        parser.error("--stream cannot be combined with --batch/--record/--replay")
+    if args.cache_context and args.replay:
+        parser.error("--cache-context cannot be combined with --replay")
+
+    if args.replay:
+        client = ReplayClient(args.replay, latency=args.replay_latency)
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("❌ GEMINI_API_KEY not set in environment")
+
+        client = get_client(api_key, args.base_url)
+        if args.record:
+            client = RecordingClient(client, args.record)
 
     prompt = " ".join(args.prompt)
     verbose = args.verbose
     dry_run = not args.unsafe
 
+    # Outline the working directory's Python files while the first request is in flight
+    prewarm_outlines(WORKING_DIR)
+
+    if args.batch:
+        run_batch_file(client, args, dry_run)
+        return
+
     if verbose:
         print(f"Running in {'UNSAFE' if not dry_run else 'SAFE'} mode")
 
-    system_instruction = "You are Killer Koala, an assistant that can explore files and run code."
+    system_instruction = SYSTEM_INSTRUCTION
 
-    messages = [types.Content(role="user", parts=[types.Part.from_text(text=prompt)])]
+    from google.genai import types
 
-    result = generate_content(client, messages, verbose, dry_run, system_instruction)
+    store = SessionStore(args.session) if args.session else None
+    previous = store.load() if store else []
+    if verbose and store:
+        print(f"Session {store.name}: {len(previous)} earlier messages")
 
-    if result:
-        print(result)
+    cached_content = None
+    if args.cache_context:
+        # Cache exactly the prefix an uncached run sends, so answers do not depend on the flag
+        context = get_cached_context(
+            client,
+            MODEL,
+            system_instruction,
+            args.pin,
+            store.extra.get("context_cache") if store else None,
+        )
+        if context:
+            cached_content = context["name"]
+            if store:
+                store.extra["context_cache"] = context
+
+    history = MessageHistory(
+        previous + [types.Content(role="user", parts=[types.Part.from_text(text=prompt)])]
+    )
+
+    start = time.perf_counter()
+    tracer = open_tracer(args.trace)
+    try:
+        for _ in range(MAX_ITERS):
+            span = tracer.start_turn() if tracer else None
+            result = error = None
+            try:
+                result = generate_content(
+                    client,
+                    history,
+                    verbose,
+                    dry_run,
+                    system_instruction,
+                    span,
+                    cached_content,
+                    stream=args.stream,
+                )
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                if tracer:
+                    tracer.end_turn(span, history, final=bool(result), error=error)
+                if store:
+                    store.save(history.messages)
+            if result:
+                if not args.stream:
+                    print(result)
+                break
+        else:
+            print(f"Stopped after {MAX_ITERS} iterations without a final response.")
+    finally:
+        if tracer:
+            tracer.close()
+        if args.record:
+            client.close()
+        if args.stats:
+            print(tool_metrics.summary())
+            if not args.replay:
+                print(model_stats.summary())
+
+    if verbose:
+        print(tool_cache.stats())
+        if args.replay:
+            replayed = client.models
+            local = time.perf_counter() - start - replayed.latency_total
+            print(
+                f"Replayed {replayed.calls} responses; local time {local:.3f}s "
+                f"(+{replayed.latency_total:.3f}s injected latency)"
+            )
 
 
 if __name__ == "__main__":
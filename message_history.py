@@ -0,0 +1,126 @@
+# message_history.py
+import hashlib
+from config import HISTORY_TOKEN_BUDGET, HISTORY_KEEP_RECENT, HISTORY_STUB_MIN_TOKENS
+
+# Rough characters-per-token ratio used before the API reports real counts
+CHARS_PER_TOKEN = 4
+
+
+def _part_text(part):
+    if part.text:
+        return part.text
+    if part.function_call:
+        return f"{part.function_call.name}{part.function_call.args}"
+    if part.function_response:
+        return f"{part.function_response.name}{part.function_response.response}"
+    return ""
+
+
+def elided_result(name, tokens):
+    """The stub that replaces an old tool result dropped to save context."""
+    return (
+        f"[Elided old {name} result (~{tokens} tokens) "
+        f"to save context; call the tool again if you still need it]"
+    )
+
+
+def _response_result(part):
+    response = part.function_response.response or {}
+    result = response.get("result", response)
+    return result if isinstance(result, str) else str(result)
+
+
+class MessageHistory:
+    """
+    The conversation sent to the model, kept under a token budget.
+    Each message carries a token estimate, calibrated against the prompt token
+    count the API reports. Before every model call, repeated tool payloads are
+    collapsed to their newest copy and, if the history is still over budget,
+    the oldest large tool results are swapped for short stubs.
+    """
+
+    def __init__(self, messages=None, budget=HISTORY_TOKEN_BUDGET):
+        self.budget = budget
+        self.messages = []
+        self.estimates = []
+        self.scale = 1.0
+        for message in messages or []:
+            self.append(message)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, message):
+        self.messages.append(message)
+        self.estimates.append(self._estimate(message))
+
+    def estimated_tokens(self):
+        return int(sum(self.estimates) * self.scale)
+
+    def record_usage(self, prompt_token_count):
+        """Calibrate the chars-per-token estimate against the real prompt size."""
+        estimate = sum(self.estimates)
+        if prompt_token_count and estimate:
+            self.scale = min(4.0, max(0.25, prompt_token_count / estimate))
+
+    def compact(self):
+        """Shrink the history in place; returns the estimated tokens saved."""
+        before = self.estimated_tokens()
+        self._dedupe()
+        if self.estimated_tokens() > self.budget:
+            self._stub_oldest()
+        return before - self.estimated_tokens()
+
+    def _estimate(self, message):
+        chars = sum(len(_part_text(part)) for part in message.parts or [])
+        return chars // CHARS_PER_TOKEN + 1
+
+    def _replace_result(self, index, part_index, stub):
+        from google.genai import types
+
+        message = self.messages[index]
+        part = message.parts[part_index]
+        parts = list(message.parts)
+        parts[part_index] = types.Part.from_function_response(
+            name=part.function_response.name, response={"result": stub}
+        )
+        self.messages[index] = types.Content(role=message.role, parts=parts)
+        self.estimates[index] = self._estimate(self.messages[index])
+
+    def _tool_results(self, stop):
+        for index in range(stop):
+            for part_index, part in enumerate(self.messages[index].parts or []):
+                if part.function_response:
+                    yield index, part_index, part
+
+    def _dedupe(self):
+        newest = {}
+        for index, part_index, part in self._tool_results(len(self.messages)):
+            result = _response_result(part)
+            if len(result) // CHARS_PER_TOKEN < HISTORY_STUB_MIN_TOKENS:
+                continue
+            digest = hashlib.sha1(result.encode("utf-8")).digest()
+            if digest in newest:
+                old_index, old_part_index, name = newest[digest]
+                self._replace_result(
+                    old_index,
+                    old_part_index,
+                    f"[Duplicate {name} result elided; the same content appears later in the conversation]",
+                )
+            newest[digest] = (index, part_index, part.function_response.name)
+
+    def _stub_oldest(self):
+        # Keep the original prompt and the most recent exchanges intact
+        stop = max(1, len(self.messages) - HISTORY_KEEP_RECENT)
+        for index, part_index, part in list(self._tool_results(stop)):
+            if index == 0:
+                continue
+            result = _response_result(part)
+            tokens = len(result) // CHARS_PER_TOKEN
+            if tokens < HISTORY_STUB_MIN_TOKENS:
+                continue
+            self._replace_result(
+                index, part_index, elided_result(part.function_response.name, tokens)
+            )
+            if self.estimated_tokens() <= self.budget:
+                break
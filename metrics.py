@@ -0,0 +1,121 @@
+# metrics.py
+import math
+import threading
+
+# Histogram buckets per power of two (~9% resolution per bucket)
+BUCKETS_PER_DOUBLING = 8
+
+
+class Histogram:
+    """
+    Fixed-memory log-bucketed histogram: exact count/total/min/max, and
+    percentiles accurate to one bucket. Not thread-safe on its own.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        bucket = math.floor(math.log2(value) * BUCKETS_PER_DOUBLING) if value > 0 else None
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (0-100), capped at max."""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = self.buckets.get(None, 0)
+        if seen >= rank:
+            return 0
+        for bucket in sorted(b for b in self.buckets if b is not None):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, 2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING))
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class ToolMetrics:
+    """Per-tool wall time, CPU time and payload-size histograms for one process."""
+
+    FIELDS = ("wall", "cpu", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tools = {}
+        self.cache_hits = {}
+
+    def record(self, name, wall, cpu, bytes_in, bytes_out, cache_hit=False):
+        with self._lock:
+            histograms = self.tools.get(name)
+            if histograms is None:
+                histograms = self.tools[name] = {field: Histogram() for field in self.FIELDS}
+                self.cache_hits[name] = 0
+            histograms["wall"].record(wall)
+            histograms["cpu"].record(cpu)
+            histograms["bytes_in"].record(bytes_in)
+            histograms["bytes_out"].record(bytes_out)
+            if cache_hit:
+                self.cache_hits[name] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                name: dict(
+                    {field: histogram.as_dict() for field, histogram in histograms.items()},
+                    cache_hits=self.cache_hits[name],
+                )
+                for name, histograms in self.tools.items()
+            }
+
+    def summary(self):
+        """A fixed-width table, slowest tools (by total wall time) first."""
+        stats = self.as_dict()
+        if not stats:
+            return "Tool stats: no tool calls"
+        lines = [
+            f"{'tool':<18} {'calls':>5} {'hits':>5} {'wall p50':>9} {'p95':>9} {'max':>9} "
+            f"{'total':>9} {'cpu total':>9} {'in':>9} {'out p95':>9} {'out total':>10}"
+        ]
+        for name, s in sorted(stats.items(), key=lambda item: -item[1]["wall"]["total"]):
+            wall = s["wall"]
+            lines.append(
+                f"{name:<18} {wall['count']:>5} {s['cache_hits']:>5} "
+                f"{_ms(wall['p50']):>9} {_ms(wall['p95']):>9} {_ms(wall['max']):>9} "
+                f"{_ms(wall['total']):>9} {_ms(s['cpu']['total']):>9} "
+                f"{_size(s['bytes_in']['total']):>9} {_size(s['bytes_out']['p95']):>9} "
+                f"{_size(s['bytes_out']['total']):>10}"
+            )
+        return "\n".join(lines)
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.1f}ms"
+
+
+def _size(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024 or unit == "MB":
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+
+
+tool_metrics = ToolMetrics()
@@ -0,0 +1,385 @@
+# model_client.py
+import random
+import re
+import threading
+import time
+
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    MODEL_BACKOFF_BASE,
+    MODEL_BACKOFF_MAX,
+    MODEL_CALL_DEADLINE,
+    MODEL_MAX_CONNECTIONS,
+    MODEL_MAX_RETRIES,
+)
+from metrics import Histogram
+
+# Statuses worth another attempt; anything else is the request's own fault
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class EmptyStreamError(RuntimeError):
+    """A streamed response that ended before its first chunk; retried like a dropped connection."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed attempts. While open every call
+    fails fast; after `reset_after` seconds one trial call is let through and
+    its outcome closes or re-opens the circuit. A trial that ends without a
+    verdict on the API (an unrelated exception, cancellation) must release().
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_after=CIRCUIT_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError, or return True when this call is the half-open trial."""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            wait = self.opened_at + self.reset_after - time.monotonic()
+            if wait > 0 or self.trial_running:
+                raise CircuitOpenError(
+                    f"Model API circuit open after {self.failures} consecutive failures; "
+                    f"next attempt allowed in {max(wait, 0):.1f}s"
+                )
+            self.trial_running = True
+            return True
+
+    def release(self):
+        with self._lock:
+            self.trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+            self.trial_running = False
+
+
+class ModelCallStats:
+    """Latency (per call, retries included) and retry/failure counts for the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram()
+        self.attempt_latency = Histogram()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def record_attempt(self, seconds):
+        with self._lock:
+            self.attempt_latency.record(seconds)
+
+    def record_call(self, seconds, retries, failed=False, rejected=False):
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            if rejected:
+                self.rejected += 1
+            elif failed:
+                self.failures += 1
+            else:
+                self.latency.record(seconds)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "circuit_rejections": self.rejected,
+                "latency": self.latency.as_dict(),
+                "attempt_latency": self.attempt_latency.as_dict(),
+            }
+
+    def summary(self):
+        stats = self.as_dict()
+        latency = stats["latency"]
+        return (
+            f"Model calls: {stats['calls']} ({stats['retries']} retries, "
+            f"{stats['failures']} failed, {stats['circuit_rejections']} rejected by the circuit "
+            f"breaker); latency p50 {latency['p50']:.2f}s p95 {latency['p95']:.2f}s "
+            f"p99 {latency['p99']:.2f}s max {latency['max'] or 0:.2f}s"
+        )
+
+
+model_stats = ModelCallStats()
+
+
+def _status(error):
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error):
+    import httpx
+
+    if isinstance(error, httpx.TransportError):
+        return True
+    return _status(error) in RETRY_STATUSES
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After header or RetryInfo), or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # Gemini also reports it in the error body: {"retryDelay": "12s"}
+    found = re.search(r"'retryDelay': '([\d.]+)s'", str(getattr(error, "details", "")))
+    return float(found.group(1)) if found else None
+
+
+class _Attempts:
+    """Deadline, backoff and breaker bookkeeping for one logical model call."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.start = time.monotonic()
+        self.deadline = self.start + owner.deadline
+        self.retries = 0
+        self.attempt_start = None
+        self.trial = False
+        self.in_flight = False
+
+    def begin(self):
+        """Check the deadline and breaker; returns the seconds this attempt may take."""
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            self.owner.stats.record_call(0.0, self.retries, failed=True)
+            raise TimeoutError(f"Model call exceeded its {self.owner.deadline:.0f}s deadline")
+        try:
+            self.trial = self.owner.breaker.before_call()
+        except CircuitOpenError:
+            self.owner.stats.record_call(0.0, self.retries, rejected=True)
+            raise
+        self.in_flight = True
+        self.attempt_start = time.monotonic()
+        return remaining
+
+    def end(self):
+        """Called after every attempt: releases a trial that succeeded()/failed() did not settle."""
+        if self.in_flight and self.trial:
+            self.owner.breaker.release()
+        self.in_flight = False
+
+    def succeeded(self):
+        now = time.monotonic()
+        self.in_flight = False
+        self.owner.breaker.record_success()
+        self.owner.stats.record_attempt(now - self.attempt_start)
+        self.owner.stats.record_call(now - self.start, self.retries)
+
+    def failed(self, error):
+        """Returns the delay before the next attempt, or re-raises `error`."""
+        now = time.monotonic()
+        self.in_flight = False
+        self.owner.stats.record_attempt(now - self.attempt_start)
+        retryable = is_retryable(error) or isinstance(error, (TimeoutError, EmptyStreamError))
+        if retryable:
+            self.owner.breaker.record_failure()
+        elif _status(error) is not None:
+            # The API answered; it was this request that was wrong
+            self.owner.breaker.record_success()
+        elif self.trial:
+            self.owner.breaker.release()
+        delay = self.owner.backoff(self.retries, error)
+        if not retryable or self.retries >= self.owner.max_retries or now + delay >= self.deadline:
+            self.owner.stats.record_call(now - self.start, self.retries, failed=True)
+            raise error
+        self.retries += 1
+        return delay
+
+
+class ResilientClient:
+    """
+    Wraps a genai.Client so client.models.generate_content (and
+    generate_content_stream) and client.aio.models.generate_content retry 429/5xx/network errors with
+    jittered exponential backoff, honor Retry-After, stop at a per-call
+    deadline and fail fast while the shared circuit breaker is open.
+    """
+
+    def __init__(
+        self,
+        client,
+        deadline=MODEL_CALL_DEADLINE,
+        max_retries=MODEL_MAX_RETRIES,
+        breaker=None,
+        stats=None,
+    ):
+        self.client = client
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = stats or model_stats
+        self.models = _Models(self)
+        self.aio = _AsyncClient(self)
+        self.caches = client.caches
+
+    def backoff(self, retries, error):
+        # Full jitter, but never sooner than the server asked for
+        delay = random.uniform(0, min(MODEL_BACKOFF_MAX, MODEL_BACKOFF_BASE * 2**retries))
+        return max(delay, retry_after(error) or 0.0)
+
+    @staticmethod
+    def with_timeout(config, seconds):
+        from google.genai import types
+
+        http_options = types.HttpOptions(timeout=max(1, int(seconds * 1000)))
+        if config is None:
+            return types.GenerateContentConfig(http_options=http_options)
+        return config.model_copy(update={"http_options": http_options})
+
+
+class _Models:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate_content(self, *, model, contents, config=None):
+        attempts = _Attempts(self._owner)
+        while True:
+            remaining = attempts.begin()
+            try:
+                response = self._owner.client.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=self._owner.with_timeout(config, remaining),
+                )
+            except Exception as e:
+                time.sleep(attempts.failed(e))
+                continue
+            else:
+                attempts.succeeded()
+                return response
+            finally:
+                attempts.end()
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        """
+        Like generate_content, but yields the response chunks. Only attempts
+        that fail before their first chunk are retried: once text has been
+        shown there is no taking it back.
+        """
+        attempts = _Attempts(self._owner)
+        while True:
+            remaining = attempts.begin()
+            try:
+                stream = iter(
+                    self._owner.client.models.generate_content_stream(
+                        model=model,
+                        contents=contents,
+                        config=self._owner.with_timeout(config, remaining),
+                    )
+                )
+                first = next(stream, None)
+                if first is None:
+                    raise EmptyStreamError("The model API closed the stream without sending a chunk")
+            except Exception as e:
+                time.sleep(attempts.failed(e))
+                continue
+            else:
+                attempts.succeeded()
+                break
+            finally:
+                attempts.end()
+        yield first
+        yield from stream
+
+
+class _AsyncModels:
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def generate_content(self, *, model, contents, config=None):
+        import asyncio
+
+        attempts = _Attempts(self._owner)
+        while True:
+            remaining = attempts.begin()
+            try:
+                response = await asyncio.wait_for(
+                    self._owner.client.aio.models.generate_content(
+                        model=model,
+                        contents=contents,
+                        config=self._owner.with_timeout(config, remaining),
+                    ),
+                    remaining,
+                )
+            except Exception as e:
+                await asyncio.sleep(attempts.failed(e))
+                continue
+            else:
+                attempts.succeeded()
+                return response
+            finally:
+                attempts.end()
+
+
+class _AsyncClient:
+    def __init__(self, owner):
+        self.models = _AsyncModels(owner)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=None):
+    """
+    The process-wide ResilientClient for (api_key, base_url). Every turn and
+    every batch session shares it, and with it one pooled set of keep-alive
+    HTTP connections and one circuit breaker.
+    """
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            from google import genai
+            from google.genai import types
+
+            limits = httpx.Limits(
+                max_connections=MODEL_MAX_CONNECTIONS,
+                max_keepalive_connections=MODEL_MAX_CONNECTIONS,
+            )
+            http_options = types.HttpOptions(
+                base_url=base_url,
+                client_args={"limits": limits},
+                async_client_args={"limits": limits},
+            )
+            client = _clients[key] = ResilientClient(
+                genai.Client(api_key=api_key, http_options=http_options)
+            )
+    return client
@@ -0,0 +1,146 @@
+# session_store.py
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from config import (
+    HISTORY_KEEP_RECENT,
+    HISTORY_STUB_MIN_TOKENS,
+    HISTORY_TOKEN_BUDGET,
+    SESSION_BLOB_DIR,
+    SESSION_BLOB_MIN_BYTES,
+    SESSION_DIR,
+)
+from functions.safe_path import PROJECT_ROOT
+from message_history import CHARS_PER_TOKEN, elided_result
+
+SESSION_VERSION = 1
+_SESSION_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class SessionStore:
+    """
+    One named conversation on disk: a gzipped JSON manifest of the messages,
+    where every tool payload string of SESSION_BLOB_MIN_BYTES or more is
+    replaced by {"$blob": sha256, "size": n}. Blob files are shared by all
+    sessions, written once and only read back for results that will
+    actually be sent to the model again.
+    """
+
+    def __init__(self, name, root=PROJECT_ROOT):
+        if not _SESSION_NAME.match(name):
+            raise ValueError(f"Invalid session name: {name!r} (use letters, digits, '.', '_', '-')")
+        self.name = name
+        self.path = os.path.join(root, SESSION_DIR, f"{name}.json.gz")
+        self.blob_dir = os.path.join(root, SESSION_BLOB_DIR)
+        self.extra = {}
+
+    # --- blobs -------------------------------------------------------------
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.gz")
+
+    def _put_blob(self, text):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, gzip.compress(data, compresslevel=6))
+        return {"$blob": digest, "size": len(data)}
+
+    def _get_blob(self, ref):
+        with open(self._blob_path(ref["$blob"]), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def _externalize(self, value):
+        if isinstance(value, str):
+            return self._put_blob(value) if len(value) >= SESSION_BLOB_MIN_BYTES else value
+        if isinstance(value, dict):
+            return {key: self._externalize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._externalize(item) for item in value]
+        return value
+
+    def _resolve(self, value):
+        if isinstance(value, dict):
+            if "$blob" in value:
+                return self._get_blob(value)
+            return {key: self._resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        return value
+
+    # --- messages ----------------------------------------------------------
+
+    def save(self, messages):
+        """Write the whole history; only payloads not already stored create blob files."""
+        dumped = []
+        for message in messages:
+            data = message.model_dump(mode="json", exclude_none=True)
+            for part in data.get("parts", []):
+                for key in ("function_call", "function_response"):
+                    if key in part:
+                        part[key] = self._externalize(part[key])
+            dumped.append(data)
+        manifest = {"version": SESSION_VERSION, "messages": dumped, **self.extra}
+        _write_atomic(
+            self.path,
+            gzip.compress(json.dumps(manifest, separators=(",", ":")).encode("utf-8"), 6),
+        )
+
+    def load(self, budget=HISTORY_TOKEN_BUDGET):
+        """
+        The stored messages as genai Contents ([] for a new session). If the
+        history is over `budget`, old large tool results are elided from
+        their recorded sizes without reading their blobs.
+        """
+        from google.genai import types
+
+        try:
+            with open(self.path, "rb") as f:
+                manifest = json.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            return []
+        if manifest.get("version") != SESSION_VERSION:
+            return []
+        self.extra = {k: v for k, v in manifest.items() if k not in ("version", "messages")}
+        messages = manifest["messages"]
+        self._elide_unread(messages, budget)
+        return [types.Content.model_validate(self._resolve(message)) for message in messages]
+
+    @staticmethod
+    def _size(value):
+        if isinstance(value, dict):
+            if "$blob" in value:
+                return value["size"]
+            return sum(SessionStore._size(item) for item in value.values())
+        if isinstance(value, list):
+            return sum(SessionStore._size(item) for item in value)
+        return len(str(value))
+
+    def _elide_unread(self, messages, budget):
+        tokens = sum(self._size(message) for message in messages) // CHARS_PER_TOKEN
+        stop = max(1, len(messages) - HISTORY_KEEP_RECENT)
+        for message in messages[1:stop]:
+            if tokens <= budget:
+                return
+            for part in message.get("parts", []):
+                response = part.get("function_response")
+                result = (response or {}).get("response", {}).get("result")
+                if not isinstance(result, dict) or "$blob" not in result:
+                    continue
+                result_tokens = result["size"] // CHARS_PER_TOKEN
+                if result_tokens < HISTORY_STUB_MIN_TOKENS:
+                    continue
+                response["response"]["result"] = elided_result(response.get("name"), result_tokens)
+                tokens -= result_tokens
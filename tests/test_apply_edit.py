@@ -0,0 +1,107 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from functions import apply_edit as apply_edit_module
+from functions.apply_edit import apply_edit
+
+ORIGINAL = "def a():\n    return 1\n\n\ndef b():\n    return 1\n\n\ndef c():\n    return 3\n"
+
+
+class TestApplyEdit(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        self.path = os.path.join(self.ws, "m.py")
+        self._write(ORIGINAL)
+        patcher = mock.patch.object(apply_edit_module, "ALLOW_WRITES", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+
+    def _write(self, text):
+        with open(self.path, "w", newline="") as f:
+            f.write(text)
+
+    def _read(self):
+        with open(self.path, newline="") as f:
+            return f.read()
+
+    def test_unified_diff(self):
+        diff = "--- a/m.py\n+++ b/m.py\n@@ -9,2 +9,2 @@\n def c():\n-    return 3\n+    return 4\n"
+        result = apply_edit(self.ws, "m.py", diff=diff)
+        self.assertTrue(result.startswith('Edited "m.py": 1 hunk(s), -1 +1 lines\n  line 9: -1 +1\n'))
+        self.assertEqual(self._read(), ORIGINAL.replace("return 3", "return 4"))
+        digest = hashlib.sha256(self._read().encode()).hexdigest()
+        self.assertTrue(result.endswith(f"sha256 {digest}"))
+
+    def test_unique_context_at_another_line_is_applied_and_reported(self):
+        diff = "@@ -3,2 +3,2 @@\n def c():\n-    return 3\n+    return 4\n"
+        result = apply_edit(self.ws, "m.py", diff=diff)
+        self.assertIn("line 9: -1 +1 (the @@ header said line 3)", result)
+        self.assertIn("return 4", self._read())
+
+    def test_ambiguous_context_away_from_the_header_is_rejected(self):
+        diff = "@@ -8,1 +8,1 @@\n-    return 1\n+    return 2\n"
+        result = apply_edit(self.ws, "m.py", diff=diff)
+        self.assertIn("appear at 2 places (2, 6)", result)
+        self.assertEqual(self._read(), ORIGINAL)
+
+    def test_ambiguous_context_at_the_header_line_is_applied_there(self):
+        diff = "@@ -6,1 +6,1 @@\n-    return 1\n+    return 2\n"
+        apply_edit(self.ws, "m.py", diff=diff)
+        self.assertEqual(self._read(), ORIGINAL.replace("b():\n    return 1", "b():\n    return 2"))
+
+    def test_zero_context_insertions_go_after_the_header_line(self):
+        self._write("a\nb\nc\n")
+        apply_edit(self.ws, "m.py", diff="@@ -2,0 +3 @@\n+X\n@@ -3,0 +5 @@\n+Y\n")
+        self.assertEqual(self._read(), "a\nb\nX\nc\nY\n")
+        apply_edit(self.ws, "m.py", diff="@@ -0,0 +1 @@\n+top\n")
+        self.assertEqual(self._read(), "top\na\nb\nX\nc\nY\n")
+
+    def test_missing_context_is_rejected(self):
+        result = apply_edit(self.ws, "m.py", diff="@@ -1,1 +1,1 @@\n-nope\n+yes\n")
+        self.assertIn("Hunk 1 (@@ -1) does not match the file", result)
+
+    def test_diff_without_hunks_is_rejected(self):
+        self.assertIn("no @@ hunks", apply_edit(self.ws, "m.py", diff="just text"))
+
+    def test_search_replace_must_match_once(self):
+        result = apply_edit(self.ws, "m.py", edits=[{"search": "return 1", "replace": "return 2"}])
+        self.assertIn("found 2 times", result)
+        result = apply_edit(self.ws, "m.py", edits=[{"search": "return 9", "replace": "x"}])
+        self.assertIn("found 0 times", result)
+        self.assertEqual(self._read(), ORIGINAL)
+
+        result = apply_edit(
+            self.ws, "m.py", edits=[{"search": "def c():\n    return 3\n", "replace": "def c():\n    return 30\n"}]
+        )
+        self.assertIn("line 9: -2 +2", result)
+        self.assertIn("return 30", self._read())
+
+    def test_expected_sha256(self):
+        digest = hashlib.sha256(ORIGINAL.encode()).hexdigest()
+        edits = [{"search": "return 3", "replace": "return 4"}]
+        result = apply_edit(self.ws, "m.py", edits=edits, expected_sha256="0" * 64)
+        self.assertIn("changed since it was read", result)
+        self.assertEqual(self._read(), ORIGINAL)
+        self.assertTrue(apply_edit(self.ws, "m.py", edits=edits, expected_sha256=digest).startswith("Edited"))
+
+    def test_crlf_is_preserved(self):
+        self._write(ORIGINAL.replace("\n", "\r\n"))
+        apply_edit(self.ws, "m.py", edits=[{"search": "def c():\n    return 3", "replace": "def c():\n    return 4"}])
+        self.assertEqual(self._read(), ORIGINAL.replace("return 3", "return 4").replace("\n", "\r\n"))
+
+    def test_dry_run_leaves_the_file_alone(self):
+        result = apply_edit(self.ws, "m.py", edits=[{"search": "return 3", "replace": "return 4"}], dry_run=True)
+        self.assertTrue(result.startswith("[DryRun] Would edit"))
+        self.assertEqual(self._read(), ORIGINAL)
+        self.assertEqual(os.listdir(self.ws), ["m.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
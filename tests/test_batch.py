@@ -0,0 +1,111 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from batch import TokenBucket, read_jobs, run_batch
+from fake_gemini import FakeGeminiServer
+from tests.test_model_client import _client
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_waits_for_refill_once_empty(self):
+        async def run():
+            bucket = TokenBucket(6000)  # 100 per second
+            start = time.monotonic()
+            await bucket.acquire(6000)
+            self.assertLess(time.monotonic() - start, 0.05)
+            await bucket.acquire(10)
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+    def test_oversized_request_waits_for_a_full_bucket(self):
+        async def run():
+            bucket = TokenBucket(6000)
+            await bucket.acquire(10**9)
+            return bucket.level
+
+        self.assertLess(asyncio.run(run()), 1)
+
+    def test_settle_refunds(self):
+        bucket = TokenBucket(60)
+        asyncio.run(bucket.acquire(50))
+        bucket.settle(-40)
+        self.assertGreaterEqual(bucket.level, 50)
+
+    def test_zero_turns_the_limit_off(self):
+        bucket = TokenBucket(0)
+        asyncio.run(bucket.acquire(10**6))
+        bucket.settle(10)
+        self.assertEqual(bucket.level, 0)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write_jobs(self, lines):
+        path = os.path.join(self.tmp, "jobs.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def _run(self, client, jobs, concurrency):
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = asyncio.run(
+                run_batch(client, jobs, self.output, concurrency, 0, 0, True, "test")
+            )
+        with open(self.output, encoding="utf-8") as f:
+            return counts, [json.loads(line) for line in f]
+
+    def test_read_jobs(self):
+        path = self._write_jobs(['"plain prompt"', "", '{"prompt": "p", "id": "x", "working_directory": "."}'])
+        self.assertEqual(
+            read_jobs(path),
+            [{"prompt": "plain prompt", "id": 1}, {"prompt": "p", "id": "x", "working_directory": "."}],
+        )
+        with self.assertRaisesRegex(ValueError, ':1: missing "prompt"'):
+            read_jobs(self._write_jobs(['{"id": 3}']))
+
+    def test_sessions_run_concurrently(self):
+        jobs = [{"prompt": f"job {i}", "id": i, "working_directory": self.tmp} for i in range(6)]
+        with FakeGeminiServer(latency=0.3) as server:
+            start = time.monotonic()
+            (succeeded, failed), records = self._run(_client(server), jobs, concurrency=6)
+            elapsed = time.monotonic() - start
+        self.assertEqual((succeeded, failed), (6, 0))
+        self.assertEqual(sorted(r["id"] for r in records), list(range(6)))
+        for record in records:
+            self.assertIsNone(record["error"])
+            self.assertEqual(record["turns"], 2)
+            self.assertTrue(record["result"].startswith("[SAFE MODE]\n\nDone: 1 tool result(s)"))
+        # Six sessions of two 0.3s turns each take 3.6s one after the other
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(server.requests, 12)
+
+    def test_transient_errors_are_retried_and_failures_recorded(self):
+        jobs = [{"prompt": "a", "id": "a", "working_directory": self.tmp}]
+        with FakeGeminiServer(fail_first=1, retry_after=0) as server:
+            (succeeded, failed), records = self._run(_client(server), jobs, concurrency=2)
+            self.assertEqual((succeeded, failed), (1, 0))
+            self.assertEqual(server.requests, 3)
+
+        jobs = [{"prompt": "b", "id": "b", "working_directory": self.tmp}]
+        with FakeGeminiServer(fail_first=1, error_status=400) as server:
+            (succeeded, failed), records = self._run(_client(server), jobs, concurrency=1)
+        self.assertEqual((succeeded, failed), (0, 1))
+        self.assertIn("400", records[-1]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from cassette import RecordingClient, ReplayClient
+from fake_gemini import FakeGeminiServer
+from tests.test_model_client import _client
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "session.jsonl")
+        from google.genai import types
+
+        self.contents = [types.Content(role="user", parts=[types.Part(text="hi")])]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_record_then_replay(self):
+        with FakeGeminiServer() as server:
+            client = RecordingClient(_client(server), self.path)
+            recorded = [
+                client.models.generate_content(model="gemini-2.0-flash-001", contents=self.contents)
+                for _ in range(2)
+            ]
+            client.close()
+        self.assertTrue(client.models._file.closed)
+
+        replay = ReplayClient(self.path)
+        for response in recorded:
+            self.assertEqual(
+                replay.models.generate_content(model="gemini-2.0-flash-001", contents=self.contents), response
+            )
+        with self.assertRaisesRegex(RuntimeError, "Cassette exhausted after 2 responses"):
+            replay.models.generate_content(model="gemini-2.0-flash-001", contents=self.contents)
+
+    def test_recording_keeps_context_caches_available(self):
+        from context_cache import get_cached_context
+
+        with FakeGeminiServer() as server:
+            client = RecordingClient(_client(server), self.path)
+            context = get_cached_context(client, "gemini-2.0-flash-001", "be brief", working_directory=self.tmp)
+            client.close()
+        self.assertEqual(context["name"], "cachedContents/fake1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from functions.get_files_info import get_files_info
+
+FILES = {
+    ".gitignore": "build/\n*.log\n!keep.log\n/top_only.txt\n",
+    "a.py": "a",
+    "a.log": "log",
+    "keep.log": "kept",
+    "top_only.txt": "t",
+    "__pycache__/z.pyc": "",
+    "b/.gitignore": "*.tmp\n",
+    "b/build/o.py": "o",
+    "b/c.py": "cc",
+    "b/top_only.txt": "t",
+    "b/x.tmp": "",
+    "b/sub/d.py": "ddd",
+    "b/sub/y.tmp": "",
+}
+
+
+class TestGetFilesInfo(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        for path, text in FILES.items():
+            full = os.path.join(self.ws, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "w") as f:
+                f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+
+    def _list(self, directory=".", **kwargs):
+        kwargs.setdefault("recursive", True)
+        return get_files_info(self.ws, directory, compact=True, **kwargs).splitlines()
+
+    def test_gitignore_rules_apply_below_their_directory(self):
+        self.assertEqual(
+            self._list(),
+            [".gitignore 37", "a.py 1", "b/", "b/.gitignore 6", "b/c.py 2", "b/sub/", "b/sub/d.py 3",
+             "b/top_only.txt 1", "keep.log 4"],
+        )
+
+    def test_subdirectory_listing_honors_parent_gitignores(self):
+        self.assertEqual(
+            self._list("b"),
+            [".gitignore 6", "c.py 2", "sub/", "sub/d.py 3", "top_only.txt 1"],
+        )
+        self.assertEqual(self._list("b/sub"), ["d.py 3"])
+
+    def test_cursor_pages_through_the_whole_listing(self):
+        full = self._list()
+        pages = []
+        cursor = None
+        while True:
+            page = self._list(page_size=4, cursor=cursor)
+            found = re.match(r'\[\.\.\.more entries; call again with cursor="(.*)" to continue\]', page[-1])
+            if not found:
+                pages += page
+                break
+            pages += page[:-1]
+            cursor = found.group(1)
+        self.assertEqual(pages, full)
+
+    def test_include_and_exclude(self):
+        self.assertEqual(
+            self._list(include="*.py"),
+            ["a.py 1", "b/", "b/c.py 2", "b/sub/", "b/sub/d.py 3"],
+        )
+        self.assertEqual(self._list("b", exclude=["sub", "*.txt"]), [".gitignore 6", "c.py 2"])
+
+    def test_max_depth_and_flat_listing(self):
+        self.assertEqual(self._list("b", max_depth=1), self._list("b", recursive=False))
+        self.assertNotIn("sub/d.py 3", self._list("b", max_depth=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
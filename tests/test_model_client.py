@@ -0,0 +1,114 @@
+import time
+import unittest
+
+from fake_gemini import FakeGeminiServer
+from model_client import CircuitBreaker, CircuitOpenError, ModelCallStats, ResilientClient
+
+
+def _client(server, **kwargs):
+    from google import genai
+    from google.genai import types
+
+    return ResilientClient(
+        genai.Client(api_key="fake", http_options=types.HttpOptions(base_url=server.base_url)),
+        stats=ModelCallStats(),
+        **kwargs,
+    )
+
+
+def _ask(client):
+    return client.models.generate_content(model="gemini-2.0-flash-001", contents="hi")
+
+
+class TestResilientClient(unittest.TestCase):
+    def test_retries_transient_errors_after_retry_after(self):
+        with FakeGeminiServer(fail_first=2, retry_after=0.1) as server:
+            client = _client(server)
+            start = time.monotonic()
+            response = _ask(client)
+            self.assertEqual(response.function_calls[0].name, "get_files_info")
+            self.assertGreaterEqual(time.monotonic() - start, 0.2)
+            self.assertEqual(server.requests, 3)
+            self.assertEqual(client.stats.retries, 2)
+
+    def test_non_retryable_error_is_raised_at_once(self):
+        with FakeGeminiServer(fail_first=1, error_status=400) as server:
+            client = _client(server)
+            with self.assertRaises(Exception) as caught:
+                _ask(client)
+            self.assertEqual(getattr(caught.exception, "code", None), 400)
+            self.assertEqual(server.requests, 1)
+
+    def test_deadline_stops_retrying(self):
+        with FakeGeminiServer(latency=1.0) as server:
+            client = _client(server, deadline=0.5)
+            start = time.monotonic()
+            with self.assertRaises(Exception):
+                _ask(client)
+            self.assertLess(time.monotonic() - start, 0.9)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_then_fails_fast(self):
+        with FakeGeminiServer(error_rate=1.0) as server:
+            client = _client(server, max_retries=0, breaker=CircuitBreaker(2, 60.0))
+            for _ in range(2):
+                with self.assertRaises(Exception):
+                    _ask(client)
+            with self.assertRaises(CircuitOpenError):
+                _ask(client)
+            self.assertEqual(server.requests, 2)
+            self.assertEqual(client.stats.rejected, 1)
+
+    def test_trial_closes_the_circuit_after_success(self):
+        with FakeGeminiServer(fail_first=2) as server:
+            breaker = CircuitBreaker(2, 0.05)
+            client = _client(server, max_retries=0, breaker=breaker)
+            for _ in range(2):
+                with self.assertRaises(Exception):
+                    _ask(client)
+            time.sleep(0.1)
+            _ask(client)
+            self.assertIsNone(breaker.opened_at)
+            self.assertFalse(breaker.trial_running)
+
+    def test_trial_failing_with_non_retryable_error_is_released(self):
+        with FakeGeminiServer(fail_first=2) as server:
+            breaker = CircuitBreaker(2, 0.05)
+            client = _client(server, max_retries=0, breaker=breaker)
+            for _ in range(2):
+                with self.assertRaises(Exception):
+                    _ask(client)
+            self.assertIsNotNone(breaker.opened_at)
+
+            # The trial reaches the API and is refused as a bad request
+            server.fail_first, server.error_status = 3, 400
+            time.sleep(0.1)
+            with self.assertRaises(Exception) as caught:
+                _ask(client)
+            self.assertEqual(getattr(caught.exception, "code", None), 400)
+            self.assertFalse(breaker.trial_running)
+
+            _ask(client)
+            self.assertIsNone(breaker.opened_at)
+
+    def test_trial_interrupted_without_a_verdict_is_released(self):
+        breaker = CircuitBreaker(1, 0.0)
+        breaker.record_failure()
+
+        class Broken:
+            caches = None
+
+            class models:
+                @staticmethod
+                def generate_content(**kwargs):
+                    raise KeyboardInterrupt
+
+        client = ResilientClient(Broken(), breaker=breaker, stats=ModelCallStats())
+        with self.assertRaises(KeyboardInterrupt):
+            _ask(client)
+        self.assertFalse(breaker.trial_running)
+
+
+if __name__ == "__main__":
+    unittest.main()
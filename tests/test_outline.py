@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from functions import get_file_outline as outline_module
+from functions.get_file_outline import get_file_outline, read_symbol
+
+SOURCE = '''import functools
+
+
+def plain(a, b=1) -> int:
+    return a + b
+\x0c
+
+def after_form_feed():
+    x = 1
+    return x
+
+
+class Shape(Base, metaclass=Meta):
+    class Inner:
+        def method(self):
+            pass
+
+    @functools.cache
+    @property
+    def area(self):
+        return 0
+
+    async def fetch(self, *args, **kwargs):
+        return None
+'''
+
+
+class TestOutline(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        with open(os.path.join(self.ws, "shapes.py"), "w", encoding="utf-8", newline="") as f:
+            f.write(SOURCE)
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+
+    def test_outline_lists_nested_symbols_with_signatures_and_ranges(self):
+        outline = get_file_outline(self.ws, "shapes.py").splitlines()
+        self.assertEqual(
+            outline[1:],
+            [
+                "def plain(a, b=1) -> int  L4-5",
+                "def after_form_feed()  L8-10",
+                "class Shape(Base, metaclass=Meta)  L13-24",
+                "  class Inner  L14-16",
+                "    def method(self)  L15-16",
+                "  def area(self)  L18-21",
+                "  async def fetch(self, *args, **kwargs)  L23-24",
+            ],
+        )
+
+    def test_read_symbol_by_qualified_name(self):
+        result = read_symbol(self.ws, "shapes.py", "Shape.Inner.method")
+        self.assertEqual(
+            result,
+            '[def Shape.Inner.method in "shapes.py", lines 15-16]\n'
+            "        def method(self):\n            pass\n",
+        )
+
+    def test_read_symbol_includes_decorators(self):
+        result = read_symbol(self.ws, "shapes.py", "Shape.area")
+        self.assertIn("    @functools.cache\n    @property\n    def area(self):\n", result)
+
+    def test_read_symbol_after_form_feed(self):
+        result = read_symbol(self.ws, "shapes.py", "after_form_feed")
+        self.assertTrue(result.endswith("def after_form_feed():\n    x = 1\n    return x\n"))
+
+    def test_bare_method_name_and_suggestions(self):
+        self.assertIn("async def fetch", read_symbol(self.ws, "shapes.py", "fetch"))
+        self.assertIn("Did you mean: Shape.area", read_symbol(self.ws, "shapes.py", "Shape.aera"))
+
+    def test_cache_is_bounded(self):
+        for name in ("a", "b", "c"):
+            with open(os.path.join(self.ws, f"{name}.py"), "w") as f:
+                f.write(f"def {name}():\n    pass\n")
+        with mock.patch.object(outline_module, "OUTLINE_CACHE_SIZE", 2):
+            for name in ("a", "b", "c"):
+                self.assertIn(f"def {name}()", get_file_outline(self.ws, f"{name}.py"))
+            self.assertLessEqual(len(outline_module._outlines), 2)
+            self.assertNotIn(os.path.join(os.path.realpath(self.ws), "a.py"), outline_module._outlines)
+
+
+if __name__ == "__main__":
+    unittest.main()
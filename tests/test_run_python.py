@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from config import RUN_PYTHON_MAX_MEMORY_MB
+from functions import python_pool
+from functions import run_python
+from functions.run_python import run_python_file
+
+# Reserves twice the cap without touching the pages, so it is cheap when uncapped
+GREEDY = f"""
+try:
+    block = bytearray({RUN_PYTHON_MAX_MEMORY_MB * 2} * 1024 * 1024)
+    print("allocated")
+except MemoryError:
+    print("refused")
+    raise
+"""
+
+
+@unittest.skipIf(run_python.resource is None, "no resource limits on this platform")
+class TestMemoryLimit(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        with open(os.path.join(self.ws, "greedy.py"), "w") as f:
+            f.write(GREEDY)
+        patcher = mock.patch.object(run_python, "ALLOW_EXEC", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        pool = python_pool._pools.pop(os.path.realpath(self.ws), None)
+        if pool is not None:
+            pool.shutdown()
+        shutil.rmtree(self.ws)
+
+    def _assert_capped(self, output):
+        self.assertIn("refused", output)
+        self.assertNotIn("allocated", output)
+        self.assertIn(f"{RUN_PYTHON_MAX_MEMORY_MB} MiB address-space limit", output)
+
+    def test_cold_runs_are_capped(self):
+        with mock.patch.object(run_python, "PYTHON_WORKER_POOL", 0):
+            self._assert_capped(run_python_file(self.ws, "greedy.py"))
+
+    def test_pooled_runs_are_capped(self):
+        with mock.patch.object(run_python, "PYTHON_WORKER_POOL", 1):
+            self._assert_capped(run_python_file(self.ws, "greedy.py"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from functions import search_code as search_module
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.search_code import search_code
+from functions.write_file_content import write_file
+
+
+class TestSymlinkEscape(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.ws = os.path.join(self.tmp, "ws")
+        outside = os.path.join(self.tmp, "outside")
+        os.makedirs(self.ws)
+        os.makedirs(outside)
+        with open(os.path.join(outside, "secret.txt"), "w") as f:
+            f.write("SECRET_TOKEN=hunter2\n")
+        with open(os.path.join(self.ws, "ok.txt"), "w") as f:
+            f.write("INSIDE_TOKEN=fine\n")
+        os.symlink("../outside/secret.txt", os.path.join(self.ws, "leak.txt"))
+        os.symlink("../outside", os.path.join(self.ws, "linkdir"))
+        os.symlink("ok.txt", os.path.join(self.ws, "inner.txt"))
+
+    def tearDown(self):
+        index = search_module._indexes.pop(os.path.abspath(self.ws), None)
+        if index is not None and os.path.exists(index.index_path):
+            os.remove(index.index_path)
+        shutil.rmtree(self.tmp)
+
+    def test_reads_through_links_out_are_refused(self):
+        self.assertIn("outside the permitted sandbox", get_file_content(self.ws, "leak.txt"))
+        self.assertIn("outside the permitted sandbox", get_file_content(self.ws, "linkdir/secret.txt"))
+        self.assertIn(
+            "outside the permitted sandbox", write_file(self.ws, "linkdir/new.txt", "x")
+        )
+
+    def test_links_inside_the_sandbox_still_work(self):
+        self.assertEqual(get_file_content(self.ws, "inner.txt"), "INSIDE_TOKEN=fine\n")
+
+    def test_search_does_not_index_links_out(self):
+        self.assertNotIn("hunter2", search_code(self.ws, "SECRET_TOKEN"))
+        self.assertIn("INSIDE_TOKEN=fine", search_code(self.ws, "INSIDE_TOKEN"))
+
+    def test_listing_skips_links_out(self):
+        listing = get_files_info(self.ws, ".", recursive=True)
+        self.assertNotIn("leak.txt", listing)
+        self.assertNotIn("linkdir", listing)
+        self.assertIn("ok.txt", listing)
+        self.assertIn("inner.txt", listing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from functions.search_code import TrigramIndex
+
+
+class _Boom:
+    def __reduce__(self):
+        return (os.mkdir, (os.path.join(tempfile.gettempdir(), "koala-pwned"),))
+
+
+class TestIndexStorage(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.cache, "index", "search.idx")
+        with open(os.path.join(self.ws, "a.py"), "w") as f:
+            f.write("def needle():\n    pass\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+        shutil.rmtree(self.cache)
+
+    def test_saved_index_loads_back(self):
+        index = TrigramIndex(self.ws, self.index_path)
+        index.refresh(force=True)
+        index.save()
+
+        loaded = TrigramIndex.load(self.ws, self.index_path)
+        self.assertEqual(loaded.files, index.files)
+        self.assertEqual(loaded.postings, index.postings)
+        self.assertEqual(loaded.next_id, index.next_id)
+        self.assertEqual(loaded.refresh(force=True), 0)
+
+    def test_planted_pickle_is_not_executed(self):
+        marker = os.path.join(tempfile.gettempdir(), "koala-pwned")
+        if os.path.isdir(marker):
+            os.rmdir(marker)
+        os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path, "wb") as f:
+            pickle.dump(_Boom(), f)
+
+        loaded = TrigramIndex.load(self.ws, self.index_path)
+        self.assertFalse(os.path.exists(marker))
+        self.assertEqual(loaded.files, {})
+
+    def test_garbage_index_is_ignored(self):
+        os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path, "wb") as f:
+            f.write(b"\x00not an index")
+        self.assertEqual(TrigramIndex.load(self.ws, self.index_path).files, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
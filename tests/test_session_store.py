@@ -0,0 +1,138 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from context_cache import get_cached_context
+from fake_gemini import FakeGeminiServer
+from session_store import SessionStore
+
+
+def _conversation(results):
+    """A user prompt, then one get_file_content call and result per entry of `results`."""
+    from google.genai import types
+
+    messages = [types.Content(role="user", parts=[types.Part(text="read the files")])]
+    for number, result in enumerate(results):
+        call = types.FunctionCall(name="get_file_content", args={"file_path": f"f{number}.txt"})
+        response = types.FunctionResponse(name="get_file_content", response={"result": result})
+        messages.append(types.Content(role="model", parts=[types.Part(function_call=call)]))
+        messages.append(types.Content(role="user", parts=[types.Part(function_response=response)]))
+    messages.append(types.Content(role="model", parts=[types.Part(text="done")]))
+    return messages
+
+
+def _blob_files(store):
+    return sorted(name for _, _, names in os.walk(store.blob_dir) for name in names)
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_round_trip_with_extra_state(self):
+        messages = _conversation(["short", "x" * 5000])
+        store = SessionStore("work", root=self.root)
+        store.extra = {"context_cache": {"name": "cachedContents/1"}}
+        store.save(messages)
+
+        loaded = SessionStore("work", root=self.root)
+        self.assertEqual(loaded.load(), messages)
+        self.assertEqual(loaded.extra, {"context_cache": {"name": "cachedContents/1"}})
+
+    def test_missing_session_is_empty(self):
+        self.assertEqual(SessionStore("new", root=self.root).load(), [])
+
+    def test_rejects_names_that_are_not_plain(self):
+        for name in ("../escape", "a/b", ""):
+            with self.assertRaises(ValueError):
+                SessionStore(name, root=self.root)
+
+    def test_large_payloads_are_stored_once(self):
+        store = SessionStore("work", root=self.root)
+        big = "y" * 5000
+        store.save(_conversation([big, big, "small"]))
+        self.assertEqual(len(_blob_files(store)), 1)
+
+        blob = os.path.join(store.blob_dir, _blob_files(store)[0][:2], _blob_files(store)[0])
+        written = os.stat(blob).st_mtime_ns
+        SessionStore("other", root=self.root).save(_conversation([big]))
+        self.assertEqual(len(_blob_files(store)), 1)
+        self.assertEqual(os.stat(blob).st_mtime_ns, written)
+        # The manifest holds a reference, not the payload
+        self.assertLess(os.path.getsize(store.path), 1000)
+
+    def test_old_results_are_elided_without_reading_their_blobs(self):
+        store = SessionStore("work", root=self.root)
+        results = [f"{number}" * 4000 for number in range(4)]
+        store.save(_conversation(results))
+        # Only the results kept in full may be read; remove the others' blobs
+        for old in results[:2]:
+            digest = store._put_blob(old)["$blob"]
+            os.remove(store._blob_path(digest))
+
+        loaded = store.load(budget=2500)
+        old_result = loaded[2].parts[0].function_response.response["result"]
+        self.assertTrue(old_result.startswith("[Elided old get_file_content result (~1000 tokens)"))
+        self.assertEqual(loaded[-2].parts[0].function_response.response["result"], results[-1])
+
+
+class TestContextCache(unittest.TestCase):
+    def setUp(self):
+        from google import genai
+        from google.genai import types
+
+        self.ws = tempfile.mkdtemp()
+        with open(os.path.join(self.ws, "NOTES.md"), "w") as f:
+            f.write("pinned notes")
+        self.server = FakeGeminiServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = genai.Client(
+            api_key="fake", http_options=types.HttpOptions(base_url=self.server.base_url)
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+
+    def _get(self, system_instruction="be brief", previous=None, pinned=()):
+        return get_cached_context(
+            self.client, "gemini-2.0-flash-001", system_instruction, pinned, previous, self.ws
+        )
+
+    def test_created_then_reused_while_unchanged(self):
+        first = self._get()
+        self.assertEqual(first["name"], "cachedContents/fake1")
+        self.assertIs(self._get(previous=first), first)
+        self.assertEqual(len(self.server.caches), 1)
+
+    def test_recreated_when_the_prefix_changes(self):
+        first = self._get()
+        self.assertNotEqual(self._get("be verbose", first)["name"], first["name"])
+        pinned = self._get(previous=first, pinned=["NOTES.md"])
+        self.assertNotEqual(pinned["fingerprint"], first["fingerprint"])
+        self.assertEqual(len(self.server.caches), 3)
+
+    def test_recreated_when_about_to_expire_or_gone(self):
+        first = self._get()
+        soon = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=1)
+        self.assertNotEqual(self._get(previous=dict(first, expire_time=soon.isoformat()))["name"], first["name"])
+        self.server.caches.clear()
+        again = self._get(previous=first)
+        self.assertEqual(list(self.server.caches), [again["name"]])
+
+    def test_refused_cache_falls_back_to_none(self):
+        self.server.fail_first = self.server.requests + 1
+        self.server.error_status = 400
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertIsNone(self._get())
+        self.assertIn("Context cache unavailable", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
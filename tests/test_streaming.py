@@ -0,0 +1,84 @@
+import io
+import shutil
+import tempfile
+import unittest
+
+from agent import MODEL, handle_stream, request_config
+from fake_gemini import FakeGeminiServer
+from message_history import MessageHistory
+from model_client import EmptyStreamError
+from tests.test_model_client import _client
+
+
+def _user(text):
+    from google.genai import types
+
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        with open(f"{self.ws}/notes.txt", "w") as f:
+            f.write("hello")
+        self.server = FakeGeminiServer(chunk_interval=0.01).start()
+        self.addCleanup(self.server.stop)
+        self.client = _client(self.server)
+        self.history = MessageHistory([_user("what is here?")])
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+
+    def _stream(self):
+        return self.client.models.generate_content_stream(
+            model=MODEL, contents=self.history.messages, config=request_config("test")
+        )
+
+    def _handle(self, chunks, out):
+        return handle_stream(chunks, self.history, False, True, working_directory=self.ws, out=out)
+
+    def test_tool_turn_then_streamed_answer(self):
+        out = io.StringIO()
+        self.assertIsNone(self._handle(self._stream(), out))
+        self.assertEqual([m.role for m in self.history.messages], ["user", "model", "user"])
+        result = self.history.messages[2].parts[0].function_response.response["result"]
+        self.assertIn("notes.txt", result)
+
+        answer = self._handle(self._stream(), out)
+        self.assertRegex(answer, r"^\[SAFE MODE\]\n\nDone: 1 tool result\(s\), first was \d+ chars\.$")
+        self.assertEqual(out.getvalue(), answer + "\n")
+        # The text arrived over several events but is kept as one part
+        self.assertEqual(len(self.history.messages[-1].parts), 1)
+
+    def test_broken_stream_keeps_submitted_calls_paired_with_results(self):
+        def breaks_after_first_chunk(chunks):
+            yield next(chunks)
+            raise ConnectionError("stream dropped")
+
+        with self.assertRaises(ConnectionError):
+            self._handle(breaks_after_first_chunk(self._stream()), io.StringIO())
+        model, results = self.history.messages[1:]
+        self.assertEqual(model.parts[0].function_call.name, "get_files_info")
+        self.assertEqual(results.parts[0].function_response.name, "get_files_info")
+
+    def test_empty_stream_is_retried(self):
+        self.server.empty_streams = 1
+        chunks = list(self._stream())
+        self.assertEqual(chunks[0].function_calls[0].name, "get_files_info")
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(self.client.stats.retries, 1)
+
+    def test_empty_streams_fail_after_the_retries(self):
+        self.server.empty_streams = 10
+        client = _client(self.server, max_retries=1)
+        with self.assertRaises(EmptyStreamError):
+            list(
+                client.models.generate_content_stream(
+                    model=MODEL, contents=self.history.messages, config=request_config("test")
+                )
+            )
+        self.assertEqual(self.server.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from call_function import call_function
+from functions.sandbox_fs import get_sandbox
+from functions.tool_cache import tool_cache
+
+
+def _call(name, working_directory, **args):
+    from google.genai import types
+
+    content = call_function(
+        types.FunctionCall(name=name, args=args), working_directory=working_directory
+    )
+    return content.parts[0].function_response.response["result"]
+
+
+class TestToolCache(unittest.TestCase):
+    def setUp(self):
+        self.ws = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.ws, "sub"))
+        self._write("a.txt", "one")
+        self._write("sub/b.txt", "two")
+        tool_cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.ws)
+
+    def _write(self, rel_path, text):
+        with open(os.path.join(self.ws, rel_path), "w") as f:
+            f.write(text)
+
+    def test_listing_sees_rewritten_files(self):
+        self.assertIn("a.txt: file_size=3 bytes", _call("get_files_info", self.ws))
+        self._write("a.txt", "one more time")
+        self.assertIn("a.txt: file_size=13 bytes", _call("get_files_info", self.ws))
+
+    def test_recursive_listing_sees_changes_in_subdirectories(self):
+        self.assertNotIn("sub/c.txt", _call("get_files_info", self.ws, recursive=True))
+        self._write("sub/c.txt", "three")
+        self.assertIn("sub/c.txt", _call("get_files_info", self.ws, recursive=True))
+
+    def test_file_reads_are_cached_until_the_file_changes(self):
+        self.assertEqual(_call("get_file_content", self.ws, file_path="a.txt"), "one")
+        hits = tool_cache.hits
+        self.assertEqual(_call("get_file_content", self.ws, file_path="a.txt"), "one")
+        self.assertEqual(tool_cache.hits, hits + 1)
+        self._write("a.txt", "changed")
+        # The sandbox snapshots stats per model turn; a new turn starts here
+        get_sandbox(self.ws).invalidate()
+        self.assertEqual(_call("get_file_content", self.ws, file_path="a.txt"), "changed")
+
+
+if __name__ == "__main__":
+    unittest.main()
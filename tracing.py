@@ -0,0 +1,101 @@
+# tracing.py
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class TurnSpan:
+    """Everything measured during one model turn; filled in as the turn runs."""
+
+    def __init__(self, session, turn):
+        self.session = session
+        self.turn = turn
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.model_ms = None
+        self.first_chunk_ms = None  # --stream only: time to the first streamed part
+        self.tools_ms = None
+        self.prompt_tokens = None
+        self.candidates_tokens = None
+        self.compacted_tokens = 0
+        self.tool_calls = []
+        self._lock = threading.Lock()
+
+    def model_done(self, seconds, usage_metadata):
+        self.model_ms = round(seconds * 1000, 3)
+        if usage_metadata:
+            self.prompt_tokens = usage_metadata.prompt_token_count
+            self.candidates_tokens = usage_metadata.candidates_token_count
+
+    def add_tool_call(self, name, seconds, bytes_in, bytes_out, cache_hit=False, error=None):
+        # Read-only calls finish on pool threads, in any order
+        call = {
+            "name": name,
+            "duration_ms": round(seconds * 1000, 3),
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "cache_hit": cache_hit,
+        }
+        if error:
+            call["error"] = error
+        with self._lock:
+            self.tool_calls.append(call)
+
+    def as_dict(self, history, final, error=None):
+        span = {
+            "session": self.session,
+            "turn": self.turn,
+            "start": round(self.start, 6),
+            "duration_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "model_ms": self.model_ms,
+            "first_chunk_ms": self.first_chunk_ms,
+            "tools_ms": self.tools_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "candidates_tokens": self.candidates_tokens,
+            "tool_calls": self.tool_calls,
+            "history_messages": len(history),
+            "history_tokens": history.estimated_tokens(),
+            "compacted_tokens": self.compacted_tokens,
+            "final": final,
+        }
+        if error:
+            span["error"] = error
+        return span
+
+
+class Tracer:
+    """
+    Appends one JSON object per model turn to a JSONL file. Spans are built
+    from numbers the loop already has, so tracing costs one small write per turn.
+    """
+
+    def __init__(self, path, session=None):
+        self.path = path
+        self.session = session or uuid.uuid4().hex[:12]
+        self.turns = 0
+        self._file = open(path, "a", encoding="utf-8")
+
+    def start_turn(self):
+        self.turns += 1
+        return TurnSpan(self.session, self.turns)
+
+    def end_turn(self, span, history, final, error=None):
+        line = json.dumps(span.as_dict(history, final, error), separators=(",", ":"))
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def open_tracer(path):
+    """A Tracer for `path`, or None when tracing is off (empty path)."""
+    if not path:
+        return None
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return Tracer(path)